@@ -9,8 +9,7 @@
 # imports
 import sys
 import copy
-import math
-import random
+import bisect
 import numpy as np
 
 # helpers
@@ -30,8 +29,11 @@ class ChrmProf:  ### xf: the profile specifically for one chromosome (allele spe
 		self.pm = pm
 		self.org = _OrgNode(0, n - 1, chromosome, pm)
 		self.mut = _MutNode(0, n - 1, chromosome, pm)
-		self.org.children.append(self.mut)
+		self.org.add_child(self.mut)
 		self.mut.parent = self.org
+		self.mut.owner = self
+		self._mut_bgns = None  # position index of the mut list, sorted bgn of each MutNode
+		self._mut_nodes = None # MutNodes in the same order. None when the index needs a rebuild
 
 	# output: bgns (list of int) [n] beginning positions for each segment
 	#         ends (list of int) [n] ending positions for each segment
@@ -42,7 +44,7 @@ class ChrmProf:  ### xf: the profile specifically for one chromosome (allele spe
 		while cur != None:
 			bgns.append(cur.bgn)
 			ends.append(cur.end)
-			cps.append(len(cur.children))
+			cps.append(len(cur.children) if cur.children != None else 0)
 			cur = cur.r
 		return bgns, ends, cps
 
@@ -78,40 +80,48 @@ class ChrmProf:  ### xf: the profile specifically for one chromosome (allele spe
 	def get_snvs(self, snvs):
 		cur = self.mut
 		while cur != None:  ###xf: go through along the chromosome
-			for snv_mut in cur.SNV_Mut_children:
-				snv_org = snv_mut.SNV_Org_parent
-				snv_tuple = (snv_org.chrm, snv_org.pos)
-				if snv_tuple not in snvs.keys():
+			for pos in cur.snvs.tolist():
+				snv_tuple = (cur.parent.chrm, pos)
+				if snv_tuple not in snvs:
 					snvs[snv_tuple] = {'copy_num': 0}
 				snvs[snv_tuple]['copy_num'] += 1
-				snvs[snv_tuple]['pm'] = snv_org.pm
+				snvs[snv_tuple]['pm'] = cur.parent.pm
 			cur = cur.r
 		return snvs
 
 	### xf: add SNVs
+	# SNVs are stored by their original position, mutated positions follow from the MutNode
 	def point_mutation(self, pos):
-		splitMut = self.mut
-		while splitMut != None and not (splitMut.bgn <= pos and pos <= splitMut.end):
-			splitMut = splitMut.r
-
-		SNV_MutNode = _SNV_MutNode(pos, self.chrm, self.pm)
-
-		SNV_MutNode.Mut_parent = splitMut
-		splitMut.SNV_Mut_children.append(SNV_MutNode)
+		splitMut = self._find_mut(pos)
 		k = pos - splitMut.bgn
 		orgNode = splitMut.parent
 		if splitMut.is_inv:
 			org_pos = orgNode.end - k
 		else:
 			org_pos = orgNode.bgn + k
-		SNV_OrgNode = _SNV_OrgNode(org_pos, orgNode.chrm, orgNode.pm)
-
-		SNV_OrgNode.Org_parent = orgNode
-		orgNode.SNV_Org_children.append(SNV_OrgNode)
+		splitMut.snvs = np.append(splitMut.snvs, org_pos)
+		return True
 
-		SNV_OrgNode.SNV_Mut_children.append(SNV_MutNode)
-		SNV_MutNode.SNV_Org_parent = SNV_OrgNode
-		#print('snv:',orgNode.chrm, orgNode.pm, pos, org_pos)
+	# add SNVs at all mutated positions of pos_list at once. positions are assigned to MutNodes with one
+	#   search over the position index, SNVs landing on the same MutNode are appended together in input order
+	def point_mutations(self, pos_list):
+		bgns, nodes = self._get_mut_index()
+		pos = np.asarray(pos_list, dtype = np.int64)
+		if len(pos) == 0:
+			return True
+		seg_idx = np.searchsorted(bgns, pos, side = 'right') - 1
+		order = np.argsort(seg_idx, kind = 'mergesort') # stable, keeps input order within a MutNode
+		seg_idx = seg_idx[order]
+		pos = pos[order]
+		starts = np.flatnonzero(np.diff(seg_idx)) + 1
+		for (i, seg_pos) in zip(seg_idx[np.r_[0, starts]].tolist(), np.split(pos, starts)):
+			splitMut = nodes[i]
+			orgNode = splitMut.parent
+			if splitMut.is_inv:
+				org_pos = orgNode.end - (seg_pos - splitMut.bgn)
+			else:
+				org_pos = orgNode.bgn + (seg_pos - splitMut.bgn)
+			splitMut.snvs = np.concatenate((splitMut.snvs, org_pos))
 		return True
 
 	def deepcopy_(self, other_muts):
@@ -127,9 +137,8 @@ class ChrmProf:  ### xf: the profile specifically for one chromosome (allele spe
 			return False
 		self._2split(bgn, end) # split mutated and original list nodes at bgn and end positions
 
-		self._rev_mut(bgn, end)
-		if snv:
-			self._rev_mut_snv(bgn, end)
+		self._rev_mut(bgn, end) # SNV positions follow their MutNode, nothing to do for them
+		self._reindex(bgn, end)
 
 		return True
 
@@ -139,7 +148,7 @@ class ChrmProf:  ### xf: the profile specifically for one chromosome (allele spe
 			return False
 		self._2split(bgn, end) # split mutated and original list nodes at bgn and end positions
 
-		head, tail = _get_head_tail(self.mut, bgn, end) ### xf: "# head is MutNode with bgn and tail is MutNode with end."
+		head, tail = self._get_head_tail(bgn, end) ### xf: "# head is MutNode with bgn and tail is MutNode with end."
 
 		newL = head.l
 		newR = tail.r
@@ -155,28 +164,14 @@ class ChrmProf:  ### xf: the profile specifically for one chromosome (allele spe
 
 		# remove old nodes from OrgNode children list and delete old nodes
 		while head != None:
-			head.parent.children.remove(head) # remove curent MutNode from children list of OrgNode
-			if snv:
-				for snv_child in head.SNV_Mut_children:
-					snv_child.SNV_Org_parent.SNV_Mut_children.remove(snv_child)
-					snv_child.Mut_parent.SNV_Mut_children.remove(snv_child)
-					del snv_child
+			head.parent.remove_child(head) # remove curent MutNode from children list of OrgNode, its SNVs go with it
 			prev = head
 			head = head.r
 			del prev
 
-		# decrement bgn and end values for segments to right of deleted region
-		seg_len = end - bgn + 1
-		cur = newR
-		while cur != None:
-			cur.bgn -= seg_len
-			cur.end -= seg_len
-			if snv:
-				for snv_child in cur.SNV_Mut_children:
-					snv_child.pos -= seg_len
-			cur = cur.r
-
+		# segments to right of deleted region are moved back
 		self.n = self.n - (end - bgn + 1)
+		self._reindex(bgn, bgn - 1)
 
 		return True
 
@@ -189,68 +184,54 @@ class ChrmProf:  ### xf: the profile specifically for one chromosome (allele spe
 			return False
 		from_ChrmProf._2split(bgn1, end1) # split mutated and original list nodes at bgn and end positions
 
-		head_, tail_ = _get_head_tail(from_ChrmProf.mut, bgn1, end1) ### xf: original head and tail, to be removed in above codes
+		head_, tail_ = from_ChrmProf._get_head_tail(bgn1, end1) ### xf: original head and tail, to be removed in above codes
 
 		newL_ = head_.l
 		newR_ = tail_.r
 
 		if newL_ == None:
-			from_ChrmProf.mut = newL_ # change the head of the mut list to right of tail if we are removing head -> tail
+			from_ChrmProf.mut = newR_ # change the head of the mut list to right of tail if we are removing head -> tail
 		if newL_ != None:
 			newL_.r = newR_
 		if newR_ != None:
 			newR_.l = newL_
+		head_.l = None
+		tail_.r = None
 		seg_len = end1 - bgn1 + 1
-		right = tail_.r
+		from_ChrmProf.n -= seg_len
+		from_ChrmProf._reindex(bgn1, bgn1 - 1)
+		if from_ChrmProf is self and ins_Pos > end1:
+			ins_Pos -= seg_len # ins_Pos is a position from before the segment was taken out
 
 		### xf: remove segment finished, start translocation to the new position in current chromosome
-		self._split(ins_Pos)
-		ins_head = _get_head_ins(self.mut, ins_Pos)
+		if ins_Pos > 0:
+			self._split(ins_Pos)
+		# the split also cuts the taken out segment if it shares an OrgNode with the node at ins_Pos,
+		#   new pieces are linked left of head_ (inverted) or right of tail_
+		while head_.l != None:
+			head_ = head_.l
+		while tail_.r != None:
+			tail_ = tail_.r
+		ins_head = self._find_mut_bgn(ins_Pos)
 		newL = ins_head.l  ### xf: copy from amp()
 		newR = ins_head
 		head_.l = newL
 		tail_.r = newR
-		if newR != None:
-			newR.l = tail_
+		newR.l = tail_
 		if newL != None:
 			newL.r = head_
-		# increment bgn and end values for inserted region and segments to right
-		# decrement bgn and end values for translocated segment end to right
-		while right is not None:
-			right.bgn -= seg_len
-			right.end -= seg_len
-			if snv:
-				for snv_child in right.SNV_Mut_children:
-					snv_child.pos -= seg_len
-			right = right.r
-		# increment bgn and end values for inserted region and segments to right
-		seg_diff = ins_Pos - bgn1
-		head_arc = head_
-		while True:
-			head_.bgn += seg_diff
-			head_.end += seg_diff
-			head_.chrm = self.chrm
-			head_.pm = self.pm
-			if snv:
-				for snv_child in head_.SNV_Mut_children:
-					snv_child.pos += seg_diff
-					snv_child.chrm = self.chrm
-					snv_child.pm = self.pm
-			if head_ == tail_:
-				break
-			head_ = head_.r
-		head_ = head_.r
-
-
-		while head_ != None:
-			head_.bgn += seg_len
-			head_.end += seg_len
-			if snv:
-				for snv_child in head_.SNV_Mut_children:
-					snv_child.pos += seg_len
-			head_ = head_.r
-		self.n = self.n + (end1 - bgn1 + 1)
-		from_ChrmProf.n -= (end1 - bgn1 + 1)
+		else:
+			self.mut = head_ # inserted at the start of the chromosome
+		cur = head_
+		while cur != newR:
+			cur.chrm = self.chrm
+			cur.pm = self.pm
+			cur.owner = self
+			cur = cur.r
+
+		# positions of the inserted region and segments to its right are updated
+		self.n = self.n + seg_len
+		self._reindex(ins_Pos, ins_Pos + seg_len - 1)
 		return from_ChrmProf
 
 	# duplicate region from bgn to end. returns boolean for complete or not
@@ -259,9 +240,10 @@ class ChrmProf:  ### xf: the profile specifically for one chromosome (allele spe
 		if not self._is_in_bounds(bgn, end) or not self._is_splitable(bgn, end):
 			return False
 		self._2split(bgn, end) # split mutated and original list nodes at bgn and end positions
+		seg_head = self._find_mut_bgn(bgn)
 		for i_amp in range(amp_num):
 			#print(i_amp)
-			insR, head, tail = _copy_from_to(self.mut, bgn, end, snv) # copy list from bgn to end
+			insR, head, tail = _copy_from_to(seg_head, bgn, end, snv) # copy list from bgn to end
 			### xf: copy means copy the whole identity including the parent-children relationship
 			### xf: duplicate two consecutive nodes, to visualize it looks like: insR-head-.....-tail-insL for MutNode
 			insL = insR.r # node to go after tail
@@ -271,18 +253,9 @@ class ChrmProf:  ### xf: the profile specifically for one chromosome (allele spe
 			if insL != None:
 				insL.l = tail
 
-			# increment bgn and end values for inserted region and segments to right
-			seg_len = end - bgn + 1
-			head_arch = head.copy()
-			while head != None:
-				head.bgn += seg_len
-				head.end += seg_len
-				if snv:
-					for snv_child in head.SNV_Mut_children:
-						snv_child.pos += seg_len
-						#print('child:',snv_child.pos)
-				head = head.r
-			self.n = self.n + (end - bgn + 1)
+		# positions of the inserted copies and segments to right are updated
+		self.n = self.n + amp_num * (end - bgn + 1)
+		self._reindex(end + 1, end + amp_num * (end - bgn + 1))
 		return True
 
 	# split bgn and end positions if needed. do not need to split at start or terminal of chromosome
@@ -302,9 +275,7 @@ class ChrmProf:  ### xf: the profile specifically for one chromosome (allele spe
 			return
 
 		# find orgNode along the genome corresponding to the mutNode where split will occur
-		splitMut = self.mut
-		while splitMut != None and not (splitMut.bgn <= k and k <= splitMut.end):
-			splitMut = splitMut.r
+		splitMut = self._find_mut(k)
 		orgNode1 = splitMut.parent
 
 		if splitMut.bgn == k or splitMut.end == k-1: # should not split b/c this was already split
@@ -312,43 +283,29 @@ class ChrmProf:  ### xf: the profile specifically for one chromosome (allele spe
 
 		k = k - splitMut.bgn # make k the new length of the old node (node that will be split)
 		                     # it is now the number of nucletides in from a node where it should be split
+		seg_len = splitMut.end - splitMut.bgn + 1
 
 		# split orgNode1 and all its children
 		### xf: split the orgNode with different position according to whether this mutNode is inv or not
 		if splitMut.is_inv:
-			orgNode2 = orgNode1.split(splitMut.end - k - splitMut.bgn + 1)  ### node split k is the pure length instead of absolute pos
-			### xf: relink the parent-children relationship for SVs and SNVs
-			temp_children_list = list(orgNode1.SNV_Org_children)  ###xf: list.copy() only works for python3
-			for child in temp_children_list:
-				if child.pos >= splitMut.end - k + 1:
-					child.Org_parent = orgNode2
-					orgNode2.SNV_Org_children.append(child)
-					orgNode1.SNV_Org_children.remove(child)
-		else:
-			orgNode2 = orgNode1.split(k)
-			temp_children_list = list(orgNode1.SNV_Org_children)
-			for child in temp_children_list:
-				if child.pos >= splitMut.bgn + k:
-					child.Org_parent = orgNode2
-					orgNode2.SNV_Org_children.append(child)
-					orgNode1.SNV_Org_children.remove(child)
-		for mutNode1 in orgNode1.children:
-			mutNode2 = mutNode1.split(k)
-			mutNode2.parent = orgNode2
-			orgNode2.children.append(mutNode2)
-			temp_children_list = list(mutNode1.SNV_Mut_children)
+			k = seg_len - k ### node split k is the pure length instead of absolute pos
+		orgNode2 = orgNode1.split(k)
+		### xf: relink the parent-children relationship for SVs and SNVs
+		for mutNode1 in orgNode1.children or []:
 			if mutNode1.is_inv:
-				for mutchild in temp_children_list:
-					if mutchild.pos <= splitMut.bgn + k - 1:
-						mutchild.Mut_parent = mutNode2
-						mutNode2.SNV_Mut_children.append(mutchild)
-						mutNode1.SNV_Mut_children.remove(mutchild)
+				mutNode2 = mutNode1.split(seg_len - k) # left part of an inverted node is the right part of orgNode1
 			else:
-				for mutchild in temp_children_list:
-					if mutchild.pos >= splitMut.bgn + k:
-						mutchild.Mut_parent = mutNode2
-						mutNode2.SNV_Mut_children.append(mutchild)
-						mutNode1.SNV_Mut_children.remove(mutchild)
+				mutNode2 = mutNode1.split(k)
+			mutNode2.parent = orgNode2
+			orgNode2.add_child(mutNode2)
+			if mutNode1.is_inv and mutNode1.owner.mut is mutNode1: # mutNode2 is left of the head, it is the new head
+				mutNode1.owner.mut = mutNode2
+			mutNode1.owner._index_split(mutNode1, mutNode2) # mutNode1 can be on another chromosome after trans
+			snvs = mutNode1.snvs
+			if len(snvs) > 0:
+				is_right = snvs >= orgNode2.bgn
+				mutNode2.snvs = snvs[is_right]
+				mutNode1.snvs = snvs[~is_right]
 
 	def _is_in_bounds(self, bgn, end):
 		n = self.n
@@ -360,58 +317,121 @@ class ChrmProf:  ### xf: the profile specifically for one chromosome (allele spe
 	# returns True if bgn and end do not match any positions already in mutated list
 	def _is_splitable(self, bgn, end):
 		n = self.n
-		if bgn != 0 and _is_already_mut_bgn(self.mut, bgn):
+		if bgn != 0 and self._find_mut_bgn(bgn) is not None:
 			return False
-		if end + 1 < n and _is_already_mut_end(self.mut, end):
+		if end + 1 < n and self._find_mut_end(end) is not None:
 			return False
 		return True
 
 	def _is_splitable_one(self, insPos):
 		n = self.n
-		if insPos != 0 and _is_already_mut_bgn(self.mut, insPos):
+		if insPos != 0 and self._find_mut_bgn(insPos) is not None:
 			return False
 		return True
 
 	# returns original node that has a mutant at position pos
-	def _get_orgNode_mut_pos(pos):
-		cur = self.mut
-		while cur != None:
-			if cur.bgn >= pos and cur.end <= pos:
-				return cur.parent
-			cur = cur.r
-		return None
-
-	def _rev_mut_snv(self, bgn, end):
-		cur = self.mut
-		while cur != None and cur.bgn != bgn: # node with bgn should exist
+	def _get_orgNode_mut_pos(self, pos):
+		cur = self._find_mut(pos)
+		if cur == None:
+			return None
+		return cur.parent
+
+	# build the position index by walking the mut list once, when there is none yet (new or copied ChrmProf).
+	#   edits keep it up to date with _reindex, lookups bisect it in O(log segments)
+	def _get_mut_index(self):
+		if self._mut_nodes is None:
+			bgns, nodes = [], []
+			pos = 0
+			cur = self.mut
+			while cur != None:
+				cur.end = pos + cur.end - cur.bgn
+				cur.bgn = pos
+				pos = cur.end + 1
+				bgns.append(cur.bgn)
+				nodes.append(cur)
+				cur = cur.r
+			self._mut_bgns, self._mut_nodes = bgns, nodes
+		return self._mut_bgns, self._mut_nodes
+
+	# returns MutNode containing position pos, None if pos is out of the chromosome
+	def _find_mut(self, pos):
+		bgns, nodes = self._get_mut_index()
+		i = bisect.bisect_right(bgns, pos) - 1
+		if i < 0 or nodes[i].end < pos:
+			return None
+		return nodes[i]
+
+	# returns MutNode starting at bgn, None if no segment starts there
+	def _find_mut_bgn(self, bgn):
+		bgns, nodes = self._get_mut_index()
+		i = bisect.bisect_left(bgns, bgn)
+		if i == len(bgns) or bgns[i] != bgn:
+			return None
+		return nodes[i]
+
+	# returns MutNode ending at end, None if no segment ends there
+	def _find_mut_end(self, end):
+		cur = self._find_mut(end)
+		if cur == None or cur.end != end:
+			return None
+		return cur
+
+	# head is MutNode with bgn and tail is MutNode with end. must _2split() before so these exist!
+	def _get_head_tail(self, bgn, end):
+		return self._find_mut_bgn(bgn), self._find_mut_end(end)
+
+	# renumber the segments from position bgn on and update their index entries after an edit relinked the
+	#   mut list there. segments left of bgn are unchanged, the edited ones take the positions up to end and
+	#   the ones right of them are only walked if the edit changed the length of the chromosome. so an inv
+	#   renumbers the inverted segments only, amp, rem and trans every segment right of the edit (the shift
+	#   is not kept lazily)
+	def _reindex(self, bgn, end):
+		if self._mut_nodes is None:
+			return
+		bgns, nodes = self._mut_bgns, self._mut_nodes
+		i = bisect.bisect_left(bgns, bgn)
+		cur = nodes[i - 1].r if i > 0 else self.mut # nodes[i - 1] ends at bgn - 1, it was not edited
+		new_bgns, new_nodes = [], []
+		pos = bgn
+		while cur != None and (pos <= end or cur.bgn != pos): # past the edit, a segment at its old position
+			cur.end = pos + cur.end - cur.bgn                 #   is followed by unchanged ones only
+			cur.bgn = pos
+			pos = cur.end + 1
+			new_bgns.append(cur.bgn)
+			new_nodes.append(cur)
 			cur = cur.r
-		for snvMut in cur.SNV_Mut_children:
-			snvMut.pos = bgn + end - snvMut.pos
+		k = bisect.bisect_left(bgns, pos, i) if cur != None else len(bgns)
+		assert cur == None or nodes[k] is cur
+		bgns[i:k] = new_bgns
+		nodes[i:k] = new_nodes
+
+	# keeps the index valid after node was split into node and new_node, new_node is its new neighbour.
+	#   node is not in the index if trans took it out and has not inserted it yet
+	def _index_split(self, node, new_node):
+		if self._mut_nodes is None:
+			return
+		i = bisect.bisect_left(self._mut_bgns, min(node.bgn, new_node.bgn))
+		if i == len(self._mut_nodes) or self._mut_nodes[i] is not node:
+			return
+		if new_node.bgn < node.bgn: # inverted node, new_node is on the left
+			self._mut_bgns[i] = node.bgn
+		else:
+			i += 1
+		self._mut_bgns.insert(i, new_node.bgn)
+		self._mut_nodes.insert(i, new_node)
 
 	# reverses doubly linked list starting from node with bgn of bgn to node with end of end
 	def _rev_mut(self, bgn, end):
-		cur = self.mut
-		while cur != None and cur.bgn != bgn: # node with bgn should exist
-			cur = cur.r
-		ih = cur   # inner head
-		oh = cur.l # outer head
-		while cur != None and cur.end != end: # node with end should exist
-			cur = cur.r
-		it = cur   # inner tail
-		ot = cur.r # outer tail
+		ih, it = self._get_head_tail(bgn, end) # nodes with bgn and end should exist
+		oh = ih.l  # outer head
+		ot = it.r  # outer tail
 
-		# set region bgn and end for calculating new positions of segments
-		rgbgn, rgend = ih.bgn, it.end
-		
 		cur = ih
-		while cur != ot: # reverse linked list ih -> ... -> it
+		while cur != ot: # reverse linked list ih -> ... -> it. new positions are set by _reindex
 			prv = cur.l
 			nxt = cur.r
 			cur.l = nxt
 			cur.r = prv
-			pos_diff = _get_inv_pos_diff(rgbgn, rgend, cur.bgn, cur.end)
-			cur.bgn += pos_diff
-			cur.end += pos_diff
 			cur.is_inv = not cur.is_inv
 			cur = nxt
 
@@ -436,12 +456,43 @@ class ChrmProf:  ### xf: the profile specifically for one chromosome (allele spe
 		printnow('relations:\n')
 		cur = self.org
 		while cur != None:
-			kid_pos_strs = [ kid.get_pos_str() for kid in cur.children ]
+			kid_pos_strs = [ kid.get_pos_str() for kid in cur.children or [] ]
 			printnow('[' + str(cur.bgn) + ',' + str(cur.end) + '] -> ' + ', '.join(kid_pos_strs) + '\n')
 			cur = cur.r
 		printnow('copy numbers: ' + str(self.get_copy_nums()[2]) + '\n')
 
-class _Node:
+	# the org and mut lists are pickled as python lists of their nodes and relinked when loaded, pickling the
+	#   l and r pointers would recurse once per node (see _Node.__getstate__)
+	def __getstate__(self):
+		state = dict(self.__dict__)
+		state['_org_list'] = _get_node_list(self.org)
+		state['_mut_list'] = _get_node_list(self.mut)
+		return state
+
+	def __setstate__(self, state):
+		state = dict(state)
+		node_lists = [state.pop('_org_list'), state.pop('_mut_list')]
+		self.__dict__.update(state)
+		for nodes in node_lists:
+			for i in xrange(len(nodes)):
+				nodes[i].l = nodes[i-1] if i > 0 else None
+				nodes[i].r = nodes[i+1] if i < len(nodes) - 1 else None
+
+# nodes use __slots__, every tree node keeps its own copies of them
+class _Node(object):
+	__slots__ = ()
+
+	# l and r are restored by ChrmProf.__setstate__, which may run before or after the node's own state is set
+	def __getstate__(self):
+		return dict((key, getattr(self, key)) for key in self.__slots__ if key not in ('l', 'r'))
+
+	def __setstate__(self, state):
+		for (key, val) in state.items():
+			setattr(self, key, val)
+		for key in ('l', 'r'):
+			if not hasattr(self, key):
+				setattr(self, key, None)
+
 	def pprint(self):
 		s = self.get_pos_str()
 		if self.r != None:
@@ -452,34 +503,16 @@ class _Node:
 	def get_pos_str(self):
 		return '[' + str(self.bgn) + ',' + str(self.end) + ']'
 
-### xf: add class for SNV nodes:
-class _SNV_MutNode:
-	def __init__(self, pos, chromosome, pm):
-		self.Mut_parent = None
-		self.SNV_Org_parent = None
-		self.pos = pos
-		self.chrm = chromosome
-		self.pm = pm
-
-	def copy(self):
-		return _SNV_MutNode(self.pos, self.chrm, self.pm)
-
-class _SNV_OrgNode:
-	def __init__(self, pos, chromosome, pm):
-		self.Org_parent = None
-		self.SNV_Mut_children = []
-		self.pos = pos
-		self.chrm = chromosome
-		self.pm = pm
-
-	def copy(self):
-		return _SNV_OrgNode(self.pos, self.chrm, self.pm)
+# SNV arrays are shared between copies of a MutNode and never changed in place, assign a new array instead
+_NO_SNVS = np.zeros(0, dtype = np.int64)
+_NO_SNVS.flags.writeable = False
 
 
 class _OrgNode(_Node): ### xf: OrgNode is a single node which will be splitted during mutation. It will be linked to multiple MutNodes for mapping.
+	__slots__ = ('children', 'l', 'r', 'bgn', 'end', 'chrm', 'pm')
+
 	def __init__(self, bgn, end, chromosome, pm):
-		self.children = [] # no mutated sections
-		self.SNV_Org_children = []
+		self.children = None # no mutated sections, the list is made by add_child
 		self.l = None      # no left or right pointers
 		self.r = None
 		self.bgn = bgn
@@ -501,11 +534,25 @@ class _OrgNode(_Node): ### xf: OrgNode is a single node which will be splitted d
 	def copy(self):
 		return _OrgNode(self.bgn, self.end, self.chrm, self.pm)
 
+	def add_child(self, mut):
+		if self.children == None:
+			self.children = [mut]
+		else:
+			self.children.append(mut)
+
+	# children is None again once the last MutNode is removed, e.g. for a segment removed on every copy
+	def remove_child(self, mut):
+		self.children.remove(mut)
+		if len(self.children) == 0:
+			self.children = None
+
 
 class _MutNode(_Node):
+	__slots__ = ('parent', 'snvs', 'l', 'r', 'bgn', 'end', 'is_inv', 'chrm', 'pm', 'owner')
+
 	def __init__(self, bgn, end, chromosome, pm, is_inv = False):
 		self.parent = None
-		self.SNV_Mut_children = []
+		self.snvs = _NO_SNVS # original positions of the SNVs on this segment (numpy array)
 		self.l = None
 		self.r = None
 		self.bgn = bgn
@@ -513,15 +560,19 @@ class _MutNode(_Node):
 		self.is_inv = is_inv
 		self.chrm = chromosome
 		self.pm = pm
+		self.owner = None # ChrmProf whose mut list holds this node
 
 	def copy(self):
-		return _MutNode(self.bgn, self.end, self.chrm, self.pm, self.is_inv)
+		c = _MutNode(self.bgn, self.end, self.chrm, self.pm, self.is_inv)
+		c.owner = self.owner
+		return c
 
 	# returns pointer to new sibling on right. k (int) means k + self.begin is bgn of new sibling
 	def split(self, k):
 		if not self.is_inv:
 			r = self.r
 			self.r = _MutNode(self.bgn + k, self.end, self.chrm, self.pm, self.is_inv)
+			self.r.owner = self.owner
 			self.r.r = r    # set right of new node to the old node's old right
 			self.r.l = self # set left of new node to old node (self)
 			if r != None:
@@ -532,6 +583,7 @@ class _MutNode(_Node):
 		else:
 			l = self.l
 			self.l = _MutNode(self.bgn, self.bgn + k - 1, self.chrm, self.pm, self.is_inv)
+			self.l.owner = self.owner
 			self.l.l = l
 			self.l.r = self
 			if l != None:
@@ -546,35 +598,13 @@ class _MutNode(_Node):
 
 # helpers
 
-# head is MutNode with bgn and tail is MutNode with end. must _2split() before so these exist!
-def _get_head_tail(cur, bgn, end):
-	while cur != None and cur.bgn != bgn:
-		cur = cur.r
-	head = cur
-	while cur != None and cur.end != end:
-		cur = cur.r
-	tail = cur
-	return head, tail
-
-def _get_head_ins(cur, insPos):
-	while cur != None and cur.bgn != insPos:
-		cur = cur.r
-	head = cur
-	return head
-
-# cur (mutNode). returns True if bgn is already in mutNode list
-def _is_already_mut_bgn(cur, bgn):
-	while cur != None:
-		if bgn == cur.bgn:
-			return True
-		cur = cur.r
-	return False
-def _is_already_mut_end(cur, end):
-	while cur != None:
-		if end == cur.end:
-			return True
-		cur = cur.r
-	return False
+# nodes of the linked list beginning at head, in order
+def _get_node_list(head):
+	nodes = []
+	while head != None:
+		nodes.append(head)
+		head = head.r
+	return nodes
 
 # fm (int) is bgn index of one of the nodes. to (int) is end of one of the nodes
 ### xf: head means the current start MutNode
@@ -589,15 +619,8 @@ def _copy_from_to(head, fm, to, snv):
 	while curA != None:
 		curB = curA.copy()
 		curB.parent = curA.parent
-		curB.parent.children.append(curB) # update parent's children pointers
-		if snv:
-			for snv_child in curA.SNV_Mut_children:
-				mutB = snv_child.copy()
-				mutB.SNV_Org_parent = snv_child.SNV_Org_parent
-				snv_child.SNV_Org_parent.SNV_Mut_children.append(mutB)
-				print([j.pos for j in snv_child.SNV_Org_parent.SNV_Mut_children])
-				curB.SNV_Mut_children.append(mutB)
-				mutB.Mut_parent = curB
+		curB.parent.add_child(curB) # update parent's children pointers
+		curB.snvs = curA.snvs
 
 		if i == 0:
 			headB = curB
@@ -618,20 +641,6 @@ def _copy_from_to(head, fm, to, snv):
 		cur = cur.r
 	printnow('\n\n')
 
-#  input: rgbgn (int) region beginning. position of bgn for first node of list to be inverted
-#         rgend (int) region ending.    position of end for last  node of list to be inverted
-#         sgbgn (int) segment beginning. bgn of current segment being flipped
-#         sgend (int) segment ending.    end of current segment being flipped
-# output: d (int) change in position to be applied to bgn and end of current node
-def _get_inv_pos_diff(rgbgn, rgend, sgbgn, sgend):
-	rglen = rgend - rgbgn + 1                            # region length
-	sglen = sgend - sgbgn + 1                            # segment length
-	mid = int(math.ceil(float(rglen) / 2.0) + rgbgn - 1) # position of midpoint of region
-	l = mid - sgend                                      # distance from midpoint to segment ending
-	if rglen % 2 == 0: # even
-		return 2 * l + sglen
-	return 2 * l + sglen - 1
-
 def tri_split_str(s, bgn, end):
 	s1 = s[:bgn]
 	s2 = s[bgn:end+1]
@@ -667,10 +676,6 @@ def _get_mated_pos(cur, isBgn): ### xf: find out any breakpoint 123|124
 	return matePos, isLeft, isAdj, mateOrgNode.chrm, mateOrgNode.pm
 
 
-def _get_org_pos_snv(snv_MutNode):
-	return snv_MutNode.SNV_Org_parent.pos
-
-
 # node (MuteNode), isBgn (bool) True if considering left pos on mutant. returns position of org node
 def _get_org_pos(node, isBgn):
 	if node.is_inv:
@@ -784,7 +789,6 @@ def _deepcopy_org(headA, other_muts):
 	i = 0
 	prvB = None
 	muts = []
-	snv_org_copy_dict = {}
 	while curA != None:
 		curB = curA.copy()
 		if i == 0:
@@ -796,25 +800,11 @@ def _deepcopy_org(headA, other_muts):
 		prvB = curB
 
 		# create all mut children
-		for cA in curA.children:
+		for cA in curA.children or []:
 			cB = cA.copy()
 			cB.parent = curB
-			curB.children.append(cB)
-			for snv_cA_mut in cA.SNV_Mut_children:
-				snv_cB_mut = snv_cA_mut.copy()
-				snv_cB_mut.Mut_parent = cB
-				cB.SNV_Mut_children.append(snv_cB_mut)
-				snv_cA_org = snv_cA_mut.SNV_Org_parent
-				if snv_cA_org not in snv_org_copy_dict.keys():
-					snv_cB_org = snv_cA_org.copy()
-					snv_org_copy_dict[snv_cA_org] = snv_cB_org
-					curB.SNV_Org_children.append(snv_cB_org)
-				else:
-					snv_cB_org = snv_org_copy_dict[snv_cA_org]
-
-				snv_cB_org.Org_parent = curB
-				snv_cB_mut.SNV_Org_parent = snv_cB_org
-				snv_cB_org.SNV_Mut_children.append(snv_cB_mut)
+			curB.add_child(cB)
+			cB.snvs = cA.snvs
 			if cA.chrm == chrm and cA.pm == pm:
 				muts.append(cB)
 			else:
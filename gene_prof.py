@@ -8,7 +8,6 @@
 # Import #
 ##########
 import chrm_prof as chpr
-import random
 import numpy as np
 import sys
 import os
@@ -24,6 +23,10 @@ import combine_copy_nums as ccn
 # Functions #
 #############
 
+def get_default_sample_stats():
+	return {'draws': 0, 'rejected': 0, 'trans_draws': 0, 'trans_rejected': 0}
+
+
 def get_default_mutCount_dict(chrom_dict):
 	mutCount_dict = dict()
 	for key in chrom_dict:
@@ -31,6 +34,26 @@ def get_default_mutCount_dict(chrom_dict):
 	return mutCount_dict
 
 
+# excluded: sorted numpy array of distinct positions. returns the r-th (0 based) position >= 0 not in excluded
+def get_nth_free_pos(excluded, r):
+	# excluded[i] - i positions are free before excluded[i]
+	return r + int(np.searchsorted(excluded - np.arange(len(excluded)), r, side = 'right'))
+
+
+# a, b: sorted numpy arrays of distinct positions. returns their sorted union without sorting again
+def merge_sorted(a, b):
+	if len(a) == 0:
+		return b
+	i = np.searchsorted(a, b)
+	b = b[(i == len(a)) | (a[np.minimum(i, len(a) - 1)] != b)]
+	return np.insert(a, np.searchsorted(a, b), b)
+
+
+# uniformly chosen element of seq (list), drawn from rng (np.random.RandomState)
+def random_choice(rng, seq):
+	return seq[rng.randint(len(seq))]
+
+
 def printnow(s, newline = True):
     s = str(s)
     if newline:
@@ -49,17 +72,36 @@ class GeneProf:
 	# constants_dict contains: mut_types (list), exp_mut_size (int), exp_mut_count (int/float), cov (int), read_len (int)
 	# mutCount: number of mutations for the sample (int)
 	# maxCount: total number of mutations for the sample (int)
-	# copy_num_dict: dictionary
-
-	def __init__(self, chrom_dict, constants_dict):
+	# copy_num_dict: copy numbers of chromosomes computed by get_copy_nums_dict so far (dictionary)
+	# dirty_cn_idxs: chromosome indices whose entry in copy_num_dict is out of date after a mutation of one of
+	#                their chromosomes or of one linked to them (set)
+	# shared_keys: keys of chrom_dict whose ChrmProf is shared with another GeneProf and must be cloned before it is mutated (set)
+	# linked_keys: key of chrom_dict -> frozenset of keys whose nodes point to each other after translocations,
+	#              these ChrmProfs can only be cloned together (dictionary)
+	# sample_stats: number of drawn and rejected mutations (type, chromosome, size) and translocation targets
+	#               of this GeneProf (dictionary)
+	# rng: random number generator of all mutations drawn by this GeneProf (np.random.RandomState),
+	#      deepcopy shares it, give the copy its own one to make its mutations independent of other GeneProfs
+	# journal: events applied to this GeneProf since it was copied from its parent, in order (list of tuples)
+	#          ('amp', key, bgn, end, amp_num), ('rem', key, bgn, end), ('inv', key, bgn, end),
+	#          ('trans', key, bgn, end, key2, ins_pos) and ('snv', key, positions). key: key of chrom_dict.
+	#          replay(journal) on a copy of the parent rebuilds this GeneProf exactly
+
+	def __init__(self, chrom_dict, constants_dict, rng = np.random):
 		self.chrom_dict = chrom_dict
 		self.constants_dict = constants_dict
+		self.rng = rng
+		self.journal = []
 		self.get_constants()
 		self.mutCount = 0
 		self.maxCount = self.get_mut_count()
-		self.copy_num_dict = self.get_copy_nums_dict()
+		self.copy_num_dict = dict()
+		self.dirty_cn_idxs = set()
 		self.sv_dict = self.get_sv_read_nums_dict(self.cov, self.read_len)
 		self.snv_dict = self.get_snv_dict()
+		self.shared_keys = set()
+		self.linked_keys = dict((key, frozenset([key])) for key in chrom_dict)
+		self.sample_stats = get_default_sample_stats()
 
 
 	def get_constants(self):
@@ -73,48 +115,82 @@ class GeneProf:
 
     # get total number of mutations for the sample randomly based on mutation count distribution
 	def get_mut_count(self):
-		maxCount = int(round(np.random.poisson(self.exp_mut_count)))
+		maxCount = int(round(self.rng.poisson(self.exp_mut_count)))
 		return maxCount
 
-	# get mutation type, position, size, etc. randomly
-	def random_mutation(self):
-		mut_type = random.choice(self.mut_types)
-		mut_chr = random.choice(list(self.chrom_dict.keys()))
-		mut_size = int(round(np.random.exponential(self.constants_dict['exp_mut_size'])))
-		while mut_size <= 0:
-			mut_size = int(round(np.random.exponential(self.constants_dict['exp_mut_size'])))
-
-		temp = self.chrom_dict[mut_chr].n - mut_size
-		while temp <= 0:
-			mut_type = random.choice(self.mut_types)
-			mut_chr = random.choice(list(self.chrom_dict.keys()))
-			mut_size = int(round(np.random.exponential(self.constants_dict['exp_mut_size'])))
-			temp = self.chrom_dict[mut_chr].n - mut_size
-
-		mut_bgnPos = random.randint(0, temp)
-		mut_endPos = mut_bgnPos + mut_size - 1
+	# get mutation type, position, size, etc. randomly. type, chromosome and size are drawn again only if the
+	#   mutation does not fit the chromosome or no start is legal, the start is drawn from the legal ones directly
+	def random_mutation(self, bp_index):
+		while True:
+			mut_type = random_choice(self.rng, self.mut_types)
+			mut_chr = random_choice(self.rng, list(self.chrom_dict.keys()))
+			mut_size = int(round(self.rng.exponential(self.constants_dict['exp_mut_size'])))
+			while mut_size <= 0:
+				mut_size = int(round(self.rng.exponential(self.constants_dict['exp_mut_size'])))
+			self.sample_stats['draws'] += 1
 
-		return mut_type, mut_chr, mut_size, mut_bgnPos, mut_endPos
+			temp = self.chrom_dict[mut_chr].n - mut_size
+			if temp > 0:
+				# try one uniform start first, breakpoints are rare. if it is illegal draw among the legal starts,
+				#   together both steps still give every legal start the same probability
+				mut_bgnPos = self.rng.randint(0, temp + 1)
+				mut_endPos = mut_bgnPos + mut_size - 1
+				if self.is_legal_mutation(bp_index, mut_type, mut_chr, mut_size, mut_bgnPos, mut_endPos):
+					return mut_type, mut_chr, mut_size, mut_bgnPos, mut_endPos
+				# a start is legal if neither it nor the position after the end is a breakpoint
+				bps = self.get_bps(bp_index, mut_chr[0])
+				excluded = merge_sorted(bps[bps <= temp], bps[(bps >= mut_size) & (bps <= temp + mut_size)] - mut_size)
+				free_num = temp + 1 - len(excluded)
+				if free_num > 0:
+					mut_bgnPos = get_nth_free_pos(excluded, self.rng.randint(0, free_num))
+					mut_endPos = mut_bgnPos + mut_size - 1
+					return mut_type, mut_chr, mut_size, mut_bgnPos, mut_endPos
+			self.sample_stats['rejected'] += 1
+
+	# breakpoints (mutated positions where a segment begins, 0 excluded) on either allele of chromosome idx
+	#   of this GeneProf or of the finished ones in bp_index (sorted numpy array)
+	def get_bps(self, bp_index, idx):
+		own_bps = set(self.chrom_dict[(idx, 0)]._get_mut_index()[0][1:])
+		own_bps.update(self.chrom_dict[(idx, 1)]._get_mut_index()[0][1:])
+		return merge_sorted(bp_index.get_bps(idx), np.array(sorted(own_bps), dtype = np.int64))
+
+	# insertion position of translocated segment [bgn, end] of chr1, drawn directly from the positions of
+	#   a random chromosome that are not a breakpoint and not inside [bgn, end]. the segment is inserted
+	#   before the position, so it is at most the last position of the chromosome
+	def random_trans_ins(self, chr1, bgn, end):
+		while True:
+			chr2 = random_choice(self.rng, list(self.chrom_dict.keys()))
+			self.sample_stats['trans_draws'] += 1
+			max_pos = self.chrom_dict[chr2].n - 1
+			excluded = np.array(self.chrom_dict[chr2]._get_mut_index()[0][1:], dtype = np.int64)
+			seg_len = end - bgn + 1
+			if chr2 == chr1:
+				# leave [bgn, end] out of the range, positions right of it move left by seg_len
+				excluded = excluded[(excluded < bgn) | (excluded > end)]
+				excluded[excluded > end] -= seg_len
+				max_pos -= seg_len
+			free_num = max_pos + 1 - len(excluded)
+			if free_num > 0:
+				ins_Pos = get_nth_free_pos(excluded, self.rng.randint(0, free_num))
+				if chr2 == chr1 and ins_Pos >= bgn:
+					ins_Pos += seg_len
+				return chr2, ins_Pos
+			self.sample_stats['trans_rejected'] += 1
 
 	def random_mutation_snv(self):
-		mut_num = np.random.poisson(self.constants_dict["snv_mut_lambda"])
-		mut_chr_idx = np.random.choice(len(self.chrom_dict.keys()), size=mut_num,)
+		mut_num = self.rng.poisson(self.constants_dict["snv_mut_lambda"])
+		mut_chr_idx = self.rng.choice(len(self.chrom_dict.keys()), size=mut_num,)
 		mut_chr = []
 		mut_pos = []
 		for i in range(mut_num):
 			mut_chr_current = self.chrom_dict.keys()[mut_chr_idx[i]]
 			mut_chr.append(mut_chr_current)
-			mut_pos.append(np.random.randint(0, self.chrom_dict[mut_chr_current].n))
+			mut_pos.append(self.rng.randint(0, self.chrom_dict[mut_chr_current].n))
 		return mut_num, mut_chr, mut_pos
 
-	def is_legal_trans(self, chr1, ins_Pos, chr2, bgn, end):
-		if chr1 == chr2 and bgn <= ins_Pos <= end:
-			return False
-		if self.chrom_dict[(chr2[0], chr2[1])]._is_splitable_one(ins_Pos) is False:
-			return False
-		return True
-
-	def is_legal_mutation(self, geneprof_list, mut_type, mut_chr, mut_size, mut_bgnPos, mut_endPos):
+	# check of the uniform start tried first by random_mutation, with the same rules as its legal start draw.
+	#   bp_index holds the breakpoints of the GeneProfs of all tree nodes mutated before this one
+	def is_legal_mutation(self, bp_index, mut_type, mut_chr, mut_size, mut_bgnPos, mut_endPos):
 		mut_chr_list = [(mut_chr[0], 0), (mut_chr[0], 1)]
 		if mut_bgnPos > mut_endPos:
 			return False
@@ -122,81 +198,115 @@ class GeneProf:
 			return False
 		if self.chrom_dict[mut_chr_list[1]]._is_splitable(mut_bgnPos, mut_endPos) == False:
 			return False
-		for geneprof in geneprof_list:
-			# print 'check', geneprof, 'in geneprof_list, paternal chrom'
-			if geneprof.chrom_dict[mut_chr_list[0]]._is_splitable(mut_bgnPos, mut_endPos) == False:
-				return False
-			# print 'check', geneprof, 'in geneprof_list, maternal chrom'
-			if geneprof.chrom_dict[mut_chr_list[1]]._is_splitable(mut_bgnPos, mut_endPos) == False:
-				return False
+		# a segment ends at mut_endPos iff the next one begins at mut_endPos + 1
+		if bp_index.is_bp(mut_chr[0], mut_bgnPos) or bp_index.is_bp(mut_chr[0], mut_endPos + 1):
+			return False
 		return True
 
-	# geneProf_list contains list of geneProfs
-	def get_legal_random_mutation(self, geneprof_list):
-		mut_type, mut_chr, mut_size, mut_bgnPos, mut_endPos = self.random_mutation()
-
-		while self.is_legal_mutation(geneprof_list, mut_type, mut_chr, mut_size, mut_bgnPos, mut_endPos) == False:
-
-			mut_type, mut_chr, mut_size, mut_bgnPos, mut_endPos = self.random_mutation()
-
-		return mut_type, mut_chr, mut_size, mut_bgnPos, mut_endPos
-
 
     # make a single mutation
-	def mutate(self, geneprof_list, snv):
+	def mutate(self, bp_index, snv):
 
-		mut_type, mut_chr, mut_size, mut_bgnPos, mut_endPos = self.get_legal_random_mutation(geneprof_list)
+		mut_type, mut_chr, mut_size, mut_bgnPos, mut_endPos = self.random_mutation(bp_index) # only draws legal mutations
 		# print 'mut_type:', mut_type, 'mut_chr:', mut_chr, 'mut_size:', mut_size, 'mut_bgnPos:', mut_bgnPos, 'mut_endPos:', mut_endPos
 
 		if mut_type == 'amp':
-			amp_num = np.random.randint(1, 6)
-			self.chrom_dict[mut_chr].amp(mut_bgnPos, mut_endPos, amp_num, snv)
+			event = (mut_type, mut_chr, mut_bgnPos, mut_endPos, int(self.rng.randint(1, 6)))
+		elif mut_type == 'trans':
+			mut_chr2, ins_Pos = self.random_trans_ins(mut_chr, mut_bgnPos, mut_endPos)
+			event = (mut_type, mut_chr, mut_bgnPos, mut_endPos, mut_chr2, int(ins_Pos))
+		else:
+			event = (mut_type, mut_chr, mut_bgnPos, mut_endPos)
+		if self.apply_event(event, snv):
+			self.mutCount += 1
+
+	# apply one event (tuple, see journal) to the chromosomes and append it to the journal.
+	#   returns False, without journaling it, if the ChrmProf rejects the event
+	def apply_event(self, event, snv):
+		mut_type, mut_chr = event[0], event[1]
+		if mut_type == 'snv':
+			self.own_chroms([mut_chr])
+			self.chrom_dict[mut_chr].point_mutations(event[2])
+			self.journal.append(event)
+			return True
+
+		if mut_type == 'amp':
+			(mut_bgnPos, mut_endPos, amp_num) = event[2:]
+			self.own_chroms([mut_chr])
+			applied = self.chrom_dict[mut_chr].amp(mut_bgnPos, mut_endPos, amp_num, snv)
 
 		elif mut_type == 'rem':
-			self.chrom_dict[mut_chr].rem(mut_bgnPos, mut_endPos, snv)
+			(mut_bgnPos, mut_endPos) = event[2:]
+			self.own_chroms([mut_chr])
+			applied = self.chrom_dict[mut_chr].rem(mut_bgnPos, mut_endPos, snv)
 
 		elif mut_type == 'inv':
-			self.chrom_dict[mut_chr].inv(mut_bgnPos, mut_endPos, snv)
+			(mut_bgnPos, mut_endPos) = event[2:]
+			self.own_chroms([mut_chr])
+			applied = self.chrom_dict[mut_chr].inv(mut_bgnPos, mut_endPos, snv)
 
 		elif mut_type == 'trans':
-			mut_chr2 = random.choice(list(self.chrom_dict.keys()))
-			ins_Pos = random.randint(0, self.chrom_dict[mut_chr2].n)
-			while not self.is_legal_trans(mut_chr, ins_Pos, mut_chr2, mut_bgnPos, mut_endPos):
-				mut_chr2 = random.choice(list(self.chrom_dict.keys()))
-				ins_Pos = random.randint(0, self.chrom_dict[mut_chr2].n)
-			self.chrom_dict[mut_chr] = self.chrom_dict[mut_chr2].trans(self.chrom_dict[mut_chr], ins_Pos, mut_bgnPos, mut_endPos, snv)
+			(mut_bgnPos, mut_endPos, mut_chr2, ins_Pos) = event[2:]
+			self.own_chroms([mut_chr, mut_chr2])
+			# trans returns the source ChrmProf, or False if the segment or the insertion position is illegal
+			applied = self.chrom_dict[mut_chr2].trans(self.chrom_dict[mut_chr], ins_Pos, mut_bgnPos, mut_endPos, snv)
+			if applied is not False:
+				self.chrom_dict[mut_chr] = applied
+				self.link_chroms(mut_chr, mut_chr2)
 
-		self.copy_num_dict = self.get_copy_nums_dict()
-		self.mutCount += 1
+		else:
+			raise ValueError('unknown event type: ' + str(mut_type))
+
+		if applied is False:
+			return False
+		# copy numbers are recomputed when they are next asked for. after translocations a chromosome holds
+		#   segments of the chromosomes linked to it, editing them changes their copy numbers too
+		for key in self.linked_keys[mut_chr]:
+			self.dirty_cn_idxs.add(key[0])
+		self.journal.append(event)
+		return True
+
+	# apply the events of journal (list, see journal) in order
+	def replay(self, journal):
+		snv = self.constants_dict['snv_mut_lambda'] is not None
+		for event in journal:
+			self.apply_event(event, snv)
 
     # make multiple mutations 
-	def multi_mutations(self, geneprof_list):
+	def multi_mutations(self, bp_index):
 		if self.constants_dict['snv_mut_lambda'] is not None:
 			snv=True
 		else:
 			snv=False
 		while self.mutCount < self.maxCount:
-			self.mutate(geneprof_list, snv)
+			self.mutate(bp_index, snv)
 		if self.constants_dict['snv_mut_lambda'] is not None:
 			mut_num_snv, mut_chr_snv, mut_pos_snv = self.random_mutation_snv()
+			# positions do not move when SNVs are added, so they can be attached per chromosome in one batch
+			pos_dict = dict()
 			for i in range(mut_num_snv):
-				self.chrom_dict[mut_chr_snv[i]].point_mutation(mut_pos_snv[i])
+				pos_dict.setdefault(mut_chr_snv[i], []).append(mut_pos_snv[i])
+			for key in pos_dict:
+				self.apply_event(('snv', key, [ int(pos) for pos in pos_dict[key] ]), snv)
 
 
     # copy_num_dict: dictionary
     #                key: chromosome index (str)
     #                val: tuple of begin_idx_list, end_idx_list, copy_number_list (bgns, ends, cps)
+    # only chromosomes mutated since the last call are combined again
 	def get_copy_nums_dict(self):
 		result = dict()
 		usages = [1,1]
 		for (idx, pm) in self.chrom_dict:
 			if idx not in result:
-				(bgns_p, ends_p, cps_p) = self.chrom_dict[(idx, 0)].get_copy_nums()
-				(bgns_m, ends_m, cps_m) = self.chrom_dict[(idx, 1)].get_copy_nums()
-				triplets = [[bgns_p, ends_p, cps_p], [bgns_m, ends_m, cps_m]]
-				[res_bgns, res_ends, res_cps_1, res_cps_2] = ccn.combine_copy_nums_allelic(triplets, usages) ### xf: place where allelic CNVs are combined, modified the function to be allelic specific CNs
-				result[idx] = (res_bgns, res_ends, res_cps_1, res_cps_2)
-		
+				if idx in self.dirty_cn_idxs or idx not in self.copy_num_dict:
+					(bgns_p, ends_p, cps_p) = self.chrom_dict[(idx, 0)].get_copy_nums()
+					(bgns_m, ends_m, cps_m) = self.chrom_dict[(idx, 1)].get_copy_nums()
+					triplets = [[bgns_p, ends_p, cps_p], [bgns_m, ends_m, cps_m]]
+					[res_bgns, res_ends, res_cps_1, res_cps_2] = ccn.combine_copy_nums_allelic(triplets, usages) ### xf: place where allelic CNVs are combined, modified the function to be allelic specific CNs
+					self.copy_num_dict[idx] = (res_bgns, res_ends, res_cps_1, res_cps_2)
+				result[idx] = self.copy_num_dict[idx]
+		self.dirty_cn_idxs = set()
 		return result
 
 
@@ -206,7 +316,7 @@ class GeneProf:
 		for (idx,pm) in l:
 			print '(', idx, ',', pm, '): ', self.chrom_dict[(idx,pm)].chrm
 
-		print 'copy_num_dict:', self.copy_num_dict
+		print 'copy_num_dict:', self.get_copy_nums_dict()
 		print 'mutCount:', self.mutCount
 
 		print 'sv_reads_dict:'
@@ -333,49 +443,107 @@ class GeneProf:
 		return result
 
 
+	# chromosomes are shared with the copy and only cloned when one of the two profiles mutates them
 	def deepcopy(self):
-		# deep copy self.chrom_dict
-		chrom_dict_new = dict()
-		other_muts_dict = {}
-		muts_dict = {}
-		for (idx,pm) in list(self.chrom_dict.keys()):
-			chrom_dict_new[(idx,pm)], muts, other_muts_dict = self.chrom_dict[(idx,pm)].deepcopy_(other_muts_dict)
-			muts_dict[(idx,pm)] = muts
-		for (idx,pm) in list(self.chrom_dict.keys()):
-			if (idx,pm) in other_muts_dict.keys():
-				print("others",other_muts_dict[(idx,pm)])
-				muts_dict[(idx,pm)] += other_muts_dict[(idx,pm)]
-			muts_sorted = sorted(muts_dict[(idx,pm)], key = lambda x: x.bgn)
-			n = len(muts_sorted)
-			for i in xrange(0, n):
-				if i != 0:
-					muts_sorted[i].l = muts_sorted[i-1]
-				if i != n-1:
-					muts_sorted[i].r = muts_sorted[i+1]
-			chrom_dict_new[(idx,pm)].mut = muts_sorted[0]
-
-		constants_dict_new = copy.deepcopy(self.constants_dict)
-
-		gp = GeneProf(chrom_dict_new, constants_dict_new)
-
-		# copy self.mutCount
-		mutCount_new = self.mutCount
-		gp.mutCount = mutCount_new
-
-		# copy self.maxCount 
-		maxCount_new = self.maxCount
-		gp.maxCount = maxCount_new
-
-		# deep copy self.copy_num_dict
-		copy_num_dict_new = copy.deepcopy(self.copy_num_dict)
-		gp.copy_num_dict = copy_num_dict_new
-
-		# deep copy self.sv_dict
-		sv_dict_new = copy.deepcopy(self.sv_dict)
-		gp.sv_dict = sv_dict_new
-
-		snv_dict_new = copy.deepcopy(self.snv_dict)
-		gp.snv_dict = snv_dict_new
-
+		gp = copy.copy(self)
+		gp.chrom_dict = dict(self.chrom_dict)
+		gp.linked_keys = dict(self.linked_keys)
+		self.shared_keys = set(self.chrom_dict.keys())
+		gp.shared_keys = set(self.chrom_dict.keys())
+		gp.copy_num_dict = dict(self.copy_num_dict)
+		gp.dirty_cn_idxs = set(self.dirty_cn_idxs)
+		gp.sample_stats = get_default_sample_stats()
+		gp.journal = []
 		return gp
 
+	# clone the shared ChrmProfs of keys, together with the ones linked to them, before mutating them
+	def own_chroms(self, keys):
+		for key in keys:
+			if key in self.shared_keys:
+				group = self.linked_keys[key]
+				# assign key by key, dict.update may resize chrom_dict and change the order random mutations see
+				for (k, chrm_prof) in copy_chrom_group(self.chrom_dict, group).items():
+					self.chrom_dict[k] = chrm_prof
+				self.shared_keys -= group
+
+	# nodes of key1 and key2 can point to each other after a translocation
+	def link_chroms(self, key1, key2):
+		group = self.linked_keys[key1] | self.linked_keys[key2]
+		for key in group:
+			self.linked_keys[key] = group
+
+
+# deep copy the ChrmProfs of keys in chrom_dict. MutNodes of a chromosome can be children of OrgNodes of
+# another one after translocations, so keys must contain every chromosome linked to one of them
+# output: dictionary, key: key of chrom_dict, val: new ChrmProf
+def copy_chrom_group(chrom_dict, keys):
+	chrom_dict_new = dict()
+	other_muts_dict = {}
+	muts_dict = {}
+	for (idx,pm) in keys:
+		chrom_dict_new[(idx,pm)], muts, other_muts_dict = chrom_dict[(idx,pm)].deepcopy_(other_muts_dict)
+		muts_dict[(idx,pm)] = muts
+	assert set(other_muts_dict.keys()) <= set(keys)
+	for (idx,pm) in keys:
+		if (idx,pm) in other_muts_dict.keys():
+			muts_dict[(idx,pm)] += other_muts_dict[(idx,pm)]
+		muts_sorted = sorted(muts_dict[(idx,pm)], key = lambda x: x.bgn)
+		n = len(muts_sorted)
+		for i in xrange(0, n):
+			muts_sorted[i].owner = chrom_dict_new[(idx,pm)]
+			if i != 0:
+				muts_sorted[i].l = muts_sorted[i-1]
+			if i != n-1:
+				muts_sorted[i].r = muts_sorted[i+1]
+		chrom_dict_new[(idx,pm)].mut = muts_sorted[0] if n > 0 else None
+	return chrom_dict_new
+
+
+#########################
+# BreakpointIndex class #
+#########################
+
+# breakpoints of the GeneProfs whose mutations are finished. new mutations may not begin or end at one of them,
+#   the index is updated once per tree node so a check does not depend on the number of tree nodes
+class BreakpointIndex:
+
+	# bps_dict: dictionary
+	#           key: chromosome index (str)
+	#           val: mutated positions where a segment begins on either allele of any added GeneProf, 0 excluded (set of int)
+	# sorted_bps_dict: same positions as sorted numpy arrays, built when first asked for after an update
+
+	def __init__(self):
+		self.bps_dict = dict()
+		self.sorted_bps_dict = dict()
+
+	def add_geneprof(self, gp):
+		for (idx, pm) in gp.chrom_dict:
+			bgns = gp.chrom_dict[(idx, pm)]._get_mut_index()[0]
+			self.bps_dict.setdefault(idx, set()).update(bgns[1:])
+		self.sorted_bps_dict = dict()
+
+	def is_bp(self, idx, pos):
+		return idx in self.bps_dict and pos in self.bps_dict[idx]
+
+	def get_bps(self, idx):
+		if idx not in self.sorted_bps_dict:
+			self.sorted_bps_dict[idx] = np.array(sorted(self.bps_dict.get(idx, [])), dtype = np.int64)
+		return self.sorted_bps_dict[idx]
+
+	def copy(self):
+		other = BreakpointIndex()
+		other.bps_dict = dict((idx, set(bps)) for (idx, bps) in self.bps_dict.items())
+		return other
+
+	# breakpoints of this index that are not in other (dictionary, key: chromosome index, val: set of int)
+	def get_new_bps(self, other):
+		return dict((idx, bps - other.bps_dict.get(idx, set())) for (idx, bps) in self.bps_dict.items())
+
+	# bps_dict: as returned by get_new_bps. True if one of its breakpoints is already in this index
+	def has_any(self, bps_dict):
+		return any(not bps.isdisjoint(self.bps_dict.get(idx, ())) for (idx, bps) in bps_dict.items())
+
+	def add_bps(self, bps_dict):
+		for (idx, bps) in bps_dict.items():
+			self.bps_dict.setdefault(idx, set()).update(bps)
+		self.sorted_bps_dict = dict()
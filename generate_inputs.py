@@ -31,17 +31,21 @@ def write_cntmd_input(cntmd_dict, output_file):
 
 def vcf2cntmd_dict(vcfs_dir):
 	cntmd_dict = {}
-	vcf_files = glob.glob(vcfs_dir + '/*.vcf')
+	vcf_files = glob.glob(vcfs_dir + '/*.vcf') + glob.glob(vcfs_dir + '/*.vcf.gz')
 	print(vcf_files)
 	for vcf_file in vcf_files:
 		sample_id = int(vcf_file.split('.')[0][-1])
 		if sample_id not in cntmd_dict.keys():
 			cntmd_dict[sample_id] = {}
-		vcf_reader = vcf.Reader(open(vcf_file, 'r'))
+		vcf_reader = vcf.Reader(filename=vcf_file)
+		# bgzipped vcfs are sorted by position, so cnv records are not all at the top
+		sorted_vcf = vcf_file.endswith('.gz')
 		while True:
 			try:
 				record = next(vcf_reader)
 				if record.ID[:3] != 'cnv':
+					if sorted_vcf:
+						continue
 					break
 				if record.CHROM not in cntmd_dict[sample_id].keys():
 					cntmd_dict[sample_id][record.CHROM] = []
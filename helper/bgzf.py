@@ -0,0 +1,130 @@
+#  file: bgzf.py
+#  write BGZF (blocked gzip) files and tabix (.tbi) indices of sorted VCF records
+#  without pysam or htslib, so compressed sample vcf files can be queried by region
+
+##########
+# Import #
+##########
+import struct
+import zlib
+
+#############
+# Constants #
+#############
+
+BLOCK_SIZE = 0xff00 # max uncompressed bytes per BGZF block, as in bgzip
+EOF_BLOCK = '\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00\x42\x43\x02\x00\x1b\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+TBX_VCF = 2 # tabix preset for vcf: seq column 1, begin column 2, meta char '#'
+MIN_SHIFT = 14 # 16kb windows of the linear index
+META_BIN = 37450 # pseudo bin holding the file offsets and record counts of each sequence
+
+#############
+# Functions #
+#############
+
+# compress data (str, at most BLOCK_SIZE bytes) into one BGZF block
+def compress_block(data, level = 6):
+	compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+	cdata = compressor.compress(data) + compressor.flush()
+	# header (18 bytes) + cdata + crc32 and isize (8 bytes), BSIZE is the block size minus 1
+	header = struct.pack('<4BI2BH2BHH', 31, 139, 8, 4, 0, 0, 255, 6, 66, 67, 2, len(cdata) + 25)
+	return header + cdata + struct.pack('<II', zlib.crc32(data) & 0xffffffff, len(data))
+
+
+# bin of the half-open 0-based interval [beg, end) in the UCSC binning scheme
+def reg2bin(beg, end):
+	end -= 1
+	if beg >> 14 == end >> 14:
+		return ((1 << 15) - 1) // 7 + (beg >> 14)
+	if beg >> 17 == end >> 17:
+		return ((1 << 12) - 1) // 7 + (beg >> 17)
+	if beg >> 20 == end >> 20:
+		return ((1 << 9) - 1) // 7 + (beg >> 20)
+	if beg >> 23 == end >> 23:
+		return ((1 << 6) - 1) // 7 + (beg >> 23)
+	if beg >> 26 == end >> 26:
+		return ((1 << 3) - 1) // 7 + (beg >> 26)
+	return 0
+
+
+# input records: list of (chrom, beg, end, voff_beg, voff_end) of all records in file order, sorted by beg within
+#                each chrom and with each chrom contiguous. beg, end: 0-based half open, voff: BGZF virtual offsets
+# output the uncompressed content of the tabix index
+def get_tabix_index(records):
+	names = list()
+	ref_dict = dict() # key: chrom, val: (bins dict, linear index list, [voff_beg, voff_end, count])
+	for (chrom, beg, end, voff_beg, voff_end) in records:
+		if chrom not in ref_dict:
+			names.append(chrom)
+			ref_dict[chrom] = (dict(), list(), [voff_beg, voff_end, 0])
+		(bins, linear, meta) = ref_dict[chrom]
+		chunks = bins.setdefault(reg2bin(beg, end), [])
+		if chunks and chunks[-1][1] == voff_beg:
+			chunks[-1][1] = voff_end
+		else:
+			chunks.append([voff_beg, voff_end])
+		last_window = (end - 1) >> MIN_SHIFT
+		if len(linear) <= last_window:
+			linear.extend([None] * (last_window + 1 - len(linear)))
+		for window in range(beg >> MIN_SHIFT, last_window + 1):
+			if linear[window] is None:
+				linear[window] = voff_beg
+		meta[1] = voff_end
+		meta[2] += 1
+
+	names_str = ''.join(str(name) + '\0' for name in names)
+	result = ['TBI\1', struct.pack('<8i', len(names), TBX_VCF, 1, 2, 0, ord('#'), 0, len(names_str)), names_str]
+	for chrom in names:
+		(bins, linear, meta) = ref_dict[chrom]
+		result.append(struct.pack('<i', len(bins) + 1))
+		for bin_num in sorted(bins):
+			result.append(struct.pack('<Ii', bin_num, len(bins[bin_num])))
+			result.extend(struct.pack('<QQ', voff_beg, voff_end) for (voff_beg, voff_end) in bins[bin_num])
+		result.append(struct.pack('<IiQQQQ', META_BIN, 2, meta[0], meta[1], meta[2], 0))
+		# windows without records point to the closest record before them
+		last = linear[0] if linear[0] is not None else meta[0]
+		result.append(struct.pack('<i', len(linear)))
+		for voff in linear:
+			last = voff if voff is not None else last
+			result.append(struct.pack('<Q', last))
+	return ''.join(result)
+
+
+#########
+# Class #
+#########
+
+# writes a BGZF file to stream (opened in 'wb' mode)
+# tell() is the virtual offset of the next byte written: (offset of the current block in the file << 16) | offset in block
+class BgzfWriter:
+	def __init__(self, stream, level = 6):
+		self.stream = stream
+		self.level = level
+		self.buffer = list()
+		self.buffer_len = 0
+		self.block_offset = 0
+
+	def write(self, data):
+		while data:
+			n = min(len(data), BLOCK_SIZE - self.buffer_len)
+			self.buffer.append(data[:n])
+			self.buffer_len += n
+			data = data[n:]
+			if self.buffer_len == BLOCK_SIZE:
+				self.flush_block()
+
+	def flush_block(self):
+		if self.buffer_len > 0:
+			block = compress_block(''.join(self.buffer), self.level)
+			self.stream.write(block)
+			self.block_offset += len(block)
+			self.buffer = list()
+			self.buffer_len = 0
+
+	def tell(self):
+		return (self.block_offset << 16) | self.buffer_len
+
+	def close(self):
+		self.flush_block()
+		self.stream.write(EOF_BLOCK)
+		self.stream.close()
@@ -0,0 +1,119 @@
+#  file: csc_mtx.py
+#  compressed sparse column (csc) matrices built with numpy only, used for C, W and B. their breakpoint and snv columns
+#  are nonzero only in the subtree below the edge where each mutation arose.
+#  save() writes the npz layout of scipy.sparse.save_npz, so the files can be read back with scipy.sparse.load_npz
+
+##########
+# Import #
+##########
+import numpy as np
+
+#############
+# Functions #
+#############
+
+# input mtx (np.array, 2d). output CscMatrix with the nonzero entries of mtx
+def dense_to_csc(mtx):
+	mtx = np.asarray(mtx)
+	cols, rows = np.nonzero(mtx.T) # column major order, rows ascending within each column
+	indptr = np.zeros(mtx.shape[1] + 1, dtype = int)
+	np.cumsum(np.bincount(cols, minlength = mtx.shape[1]), out = indptr[1:])
+	return CscMatrix(mtx[rows, cols], rows, indptr, mtx.shape)
+
+# input data, rows, cols (np.array of the same length, at most one entry per position) and shape
+# output CscMatrix with the nonzero entries
+def coo_to_csc(data, rows, cols, shape):
+	data, rows, cols = np.asarray(data), np.asarray(rows, dtype = int), np.asarray(cols, dtype = int)
+	is_nonzero = data != 0
+	data, rows, cols = data[is_nonzero], rows[is_nonzero], cols[is_nonzero]
+	order = np.lexsort((rows, cols)) # column major order, rows ascending within each column
+	indptr = np.zeros(shape[1] + 1, dtype = int)
+	np.cumsum(np.bincount(cols, minlength = shape[1]), out = indptr[1:])
+	return CscMatrix(data[order], rows[order], indptr, shape)
+
+# input mtx_list (list of CscMatrix with the same number of rows). output CscMatrix with their columns side by side
+def hstack(mtx_list):
+	indptr_list = [np.zeros(1, dtype = int)]
+	offset = 0
+	for mtx in mtx_list:
+		indptr_list.append(mtx.indptr[1:] + offset)
+		offset += mtx.nnz()
+	return CscMatrix(np.concatenate([ mtx.data for mtx in mtx_list ]), np.concatenate([ mtx.indices for mtx in mtx_list ]),
+					 np.concatenate(indptr_list), (mtx_list[0].shape[0], sum(mtx.shape[1] for mtx in mtx_list)))
+
+
+#########
+# Class #
+#########
+
+# data: nonzero values, indices: their row indices, both grouped by column,
+# indptr: entries of column j are data[indptr[j]:indptr[j+1]], shape: (num_rows, num_cols)
+class CscMatrix:
+	def __init__(self, data, indices, indptr, shape):
+		self.data = np.asarray(data)
+		self.indices = np.asarray(indices, dtype = int)
+		self.indptr = np.asarray(indptr, dtype = int)
+		self.shape = (int(shape[0]), int(shape[1]))
+		self.row_order = None # (row_ptr, entries, their columns), stored entries sorted by row, built by get_rows
+
+	def nnz(self):
+		return len(self.data)
+
+	# column index of each stored entry
+	def col_indices(self):
+		return np.repeat(np.arange(self.shape[1]), np.diff(self.indptr))
+
+	# same sparsity pattern, new values
+	def with_data(self, data):
+		return CscMatrix(data, self.indices, self.indptr, self.shape)
+
+	# keep the stored entries where mask (bool np.array of length nnz) is True
+	def select(self, mask):
+		indptr = np.zeros(self.shape[1] + 1, dtype = int)
+		np.cumsum(np.bincount(self.col_indices()[mask], minlength = self.shape[1]), out = indptr[1:])
+		return CscMatrix(self.data[mask], self.indices[mask], indptr, self.shape)
+
+	# columns bgn to end - 1
+	def get_cols(self, bgn, end):
+		ptr_bgn, ptr_end = self.indptr[bgn], self.indptr[end]
+		return CscMatrix(self.data[ptr_bgn:ptr_end], self.indices[ptr_bgn:ptr_end], self.indptr[bgn:end + 1] - ptr_bgn,
+						 (self.shape[0], end - bgn))
+
+	def to_dense(self):
+		mtx = np.zeros(self.shape, dtype = self.data.dtype)
+		mtx[self.indices, self.col_indices()] = self.data
+		return mtx
+
+	# dense rows bgn to end - 1
+	def get_rows(self, bgn, end):
+		if self.row_order is None:
+			order = np.argsort(self.indices, kind = 'mergesort')
+			row_ptr = np.zeros(self.shape[0] + 1, dtype = int)
+			np.cumsum(np.bincount(self.indices, minlength = self.shape[0]), out = row_ptr[1:])
+			self.row_order = (row_ptr, order, self.col_indices()[order])
+		(row_ptr, order, cols) = self.row_order
+		entries = order[row_ptr[bgn]:row_ptr[end]]
+		mtx = np.zeros((end - bgn, self.shape[1]), dtype = self.data.dtype)
+		mtx[self.indices[entries] - bgn, cols[row_ptr[bgn]:row_ptr[end]]] = self.data[entries]
+		return mtx
+
+	# yield (bgn, end, dense rows bgn to end - 1), blocks of at most max_size entries but at least one row
+	def iter_row_blocks(self, max_size = 2 ** 22):
+		num_rows = max(1, max_size // max(self.shape[1], 1))
+		for bgn in xrange(0, self.shape[0], num_rows):
+			end = min(bgn + num_rows, self.shape[0])
+			yield bgn, end, self.get_rows(bgn, end)
+
+	# u (np.array, 2d, u.shape[1] == number of rows). output np.dot(u, dense matrix) as np.array, computed over
+	#   dense blocks of block_size columns. np.dot gives the same values as over the whole dense matrix as long
+	#   as block_size is a multiple of the column blocking of the BLAS kernel
+	def left_dot(self, u, block_size = 4096):
+		result = np.zeros((u.shape[0], self.shape[1]))
+		for bgn in xrange(0, self.shape[1], block_size):
+			end = min(bgn + block_size, self.shape[1])
+			result[:, bgn:end] = np.dot(u, self.get_cols(bgn, end).to_dense())
+		return result
+
+	def save(self, filename):
+		np.savez(filename, format = 'csc', shape = np.array(self.shape), data = self.data, indices = self.indices,
+				 indptr = self.indptr)
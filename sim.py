@@ -17,11 +17,16 @@ import os
 import argparse 
 import vcf
 import itertools
-import random
 import operator
 import datetime
 import shutil
 import pickle
+import hashlib
+import struct
+import multiprocessing
+import StringIO
+import tempfile
+import zipfile
 import pandas as pd
 
 import numpy as np
@@ -34,6 +39,8 @@ from chrm_prof import *
 sys.path.insert(0, 'helper/')
 
 import combine_copy_nums as ccn
+import bgzf
+import csc_mtx
 
 #############
 # Functions #
@@ -85,59 +92,34 @@ def main(argv):
 	constants_dict['deterministic']=args["deterministic"]
 	constants_dict['read_depth'] = args["read_depth"]
 	constants_dict['only_leaf'] = args['only_leaf']
+	constants_dict['tree_model'] = args['tree_model']
+	constants_dict['bgzip_vcf'] = args['bgzip_vcf']
+	constants_dict['mtx_format'] = args['mtx_format']
+	constants_dict['sparse_mtx'] = args['sparse_mtx']
+	constants_dict['subtree_workers'] = args['subtree_workers']
+	constants_dict['journal'] = args['journal']
+	constants_dict['subtree_depth'] = args['subtree_depth']
+	# without --seed a seed is still drawn and written to README.md, so every run can be repeated
+	constants_dict['seed'] = args['seed'] if args['seed'] is not None else int(np.random.randint(0, 2 ** 31 - 1))
 	
 	# remove chrom_dict later
 	chrom_dict = dict()
-	# chrom_dict[('1', 0)] = chpr.ChrmProf(10000000, '1', 0)  # from ICGC CNV data
-	# chrom_dict[('1', 1)] = chpr.ChrmProf(10000000, '1', 1)
-	# chrom_dict[('2', 0)] = chpr.ChrmProf(10000000, '1', 0)  # from ICGC CNV data
-	# chrom_dict[('2', 1)] = chpr.ChrmProf(10000000, '1', 1)
-	chrom_dict[('1', 0)] = chpr.ChrmProf(249198692, '1', 0) #from ICGC CNV data
-	chrom_dict[('1', 1)] = chpr.ChrmProf(249198692, '1', 1)
-	chrom_dict[('2', 0)] = chpr.ChrmProf(243048760, '2', 0)
-	chrom_dict[('2', 1)] = chpr.ChrmProf(243048760, '2', 1)
-	# chrom_dict[('3', 0)] = chpr.ChrmProf(197856433, '3', 0)
-	# chrom_dict[('3', 1)] = chpr.ChrmProf(197856433, '3', 1)
-	# chrom_dict[('4', 0)] = chpr.ChrmProf(190921709, '4', 0)
-	# chrom_dict[('4', 1)] = chpr.ChrmProf(190921709, '4', 1)
-	# chrom_dict[('5', 0)] = chpr.ChrmProf(186092833, '5', 0)
-	# chrom_dict[('5', 1)] = chpr.ChrmProf(186092833, '5', 1)
-	# chrom_dict[('6', 0)] = chpr.ChrmProf(170918031, '6', 0)
-	# chrom_dict[('6', 1)] = chpr.ChrmProf(170918031, '6', 1)
-	# chrom_dict[('7', 0)] = chpr.ChrmProf(159119220, '7', 0)
-	# chrom_dict[('7', 1)] = chpr.ChrmProf(159119220, '7', 1)
-	# chrom_dict[('8', 0)] = chpr.ChrmProf(146293414, '8', 0)
-	# chrom_dict[('8', 1)] = chpr.ChrmProf(146293414, '8', 1)
-	# chrom_dict[('9', 0)] = chpr.ChrmProf(141071475, '9', 0)
-	# chrom_dict[('9', 1)] = chpr.ChrmProf(141071475, '9', 1)
-	# chrom_dict[('10', 0)] = chpr.ChrmProf(135434551, '10', 0)
-	# chrom_dict[('10', 1)] = chpr.ChrmProf(135434551, '10', 1)
-	# chrom_dict[('11', 0)] = chpr.ChrmProf(134944770, '11', 0)
-	# chrom_dict[('11', 1)] = chpr.ChrmProf(134944770, '11', 1)
-	# chrom_dict[('12', 0)] = chpr.ChrmProf(133777645, '12', 0)
-	# chrom_dict[('12', 1)] = chpr.ChrmProf(133777645, '12', 1)
-	# chrom_dict[('13', 0)] = chpr.ChrmProf(115106996, '13', 0)
-	# chrom_dict[('13', 1)] = chpr.ChrmProf(115106996, '13', 1)
-	# chrom_dict[('14', 0)] = chpr.ChrmProf(107285437, '14', 0)
-	# chrom_dict[('14', 1)] = chpr.ChrmProf(107285437, '14', 1)
-	# chrom_dict[('15', 0)] = chpr.ChrmProf(102400037, '15', 0)
-	# chrom_dict[('15', 1)] = chpr.ChrmProf(102400037, '15', 1)
-	# chrom_dict[('16', 0)] = chpr.ChrmProf(90163275, '16', 0)
-	# chrom_dict[('16', 1)] = chpr.ChrmProf(90163275, '16', 1)
-	# chrom_dict[('17', 0)] = chpr.ChrmProf(81048659, '17', 0)
-	# chrom_dict[('17', 1)] = chpr.ChrmProf(81048659, '17', 1)
-	# chrom_dict[('18', 0)] = chpr.ChrmProf(78015057, '18', 0)
-	# chrom_dict[('18', 1)] = chpr.ChrmProf(78015057, '18', 1)
-	# chrom_dict[('19', 0)] = chpr.ChrmProf(59095126, '19', 0)
-	# chrom_dict[('19', 1)] = chpr.ChrmProf(59095126, '19', 1)
-	# chrom_dict[('20', 0)] = chpr.ChrmProf(62912463, '20', 0)
-	# chrom_dict[('20', 1)] = chpr.ChrmProf(62912463, '20', 1)
-	# chrom_dict[('21', 0)] = chpr.ChrmProf(48084820, '21', 0)
-	# chrom_dict[('21', 1)] = chpr.ChrmProf(48084820, '21', 1)
-	# chrom_dict[('22', 0)] = chpr.ChrmProf(51219006, '22', 0)
-	# chrom_dict[('22', 1)] = chpr.ChrmProf(51219006, '22', 1)
-	# chrom_dict[('23', 0)] = chpr.ChrmProf(155233846, '23', 0)
-	# chrom_dict[('23', 1)] = chpr.ChrmProf(155233846, '23', 1)
+	if args['whole_genome'] and args['chrom_sizes'] is None:
+		args['chrom_sizes'] = directory + '/icgc_grch37.chrom.sizes'
+	if args['chrom_sizes'] is not None:
+		for (chrm, length) in read_chrom_sizes(args['chrom_sizes']):
+			chrom_dict[(chrm, 0)] = chpr.ChrmProf(length, chrm, 0)
+			chrom_dict[(chrm, 1)] = chpr.ChrmProf(length, chrm, 1)
+		constants_dict['chrom_sizes'] = args['chrom_sizes']
+	else:
+		# chrom_dict[('1', 0)] = chpr.ChrmProf(10000000, '1', 0)  # from ICGC CNV data
+		# chrom_dict[('1', 1)] = chpr.ChrmProf(10000000, '1', 1)
+		# chrom_dict[('2', 0)] = chpr.ChrmProf(10000000, '1', 0)  # from ICGC CNV data
+		# chrom_dict[('2', 1)] = chpr.ChrmProf(10000000, '1', 1)
+		chrom_dict[('1', 0)] = chpr.ChrmProf(249198692, '1', 0) #from ICGC CNV data
+		chrom_dict[('1', 1)] = chpr.ChrmProf(249198692, '1', 1)
+		chrom_dict[('2', 0)] = chpr.ChrmProf(243048760, '2', 0)
+		chrom_dict[('2', 1)] = chpr.ChrmProf(243048760, '2', 1)
 
 	# sub_folder_name = 'n_' + str(n) + '_m_' + str(m) + '_l_' + str(num_mutes)
 	if not os.path.exists(output_folder):
@@ -146,125 +128,150 @@ def main(argv):
 	for key, value in constants_dict.items():
 		readme.write(str(key) + ":" + str(value) + "\n")
 	readme.close()
-	for patient_idx in range(1, 1 + constants_dict['num_patients']):
-		patient_folder_name = 'patient' + str(patient_idx)
-
-		# outputFolder = directory + '/sim_data' + '/' + sub_folder_name + '/' + patient_folder_name
-		outputFolder = output_folder + '/' + patient_folder_name
-
-		# clean up existing files under outputFolder
-		if os.path.exists(outputFolder):
-			shutil.rmtree(outputFolder)
-		os.makedirs(outputFolder)
+	# seeds of the patients only depend on --seed and the patient index, not on the number of workers
+	patient_args_list = [ (patient_idx, output_folder, metaFile, chrom_dict, constants_dict,
+						   get_child_seed(constants_dict['seed'], 'patient', patient_idx))
+						  for patient_idx in range(1, 1 + constants_dict['num_patients']) ]
+	if args['workers'] > 1:
+		pool = multiprocessing.Pool(args['workers'])
+		pool.map(simulate_patient_star, patient_args_list, chunksize = 1)
+		pool.close()
+		pool.join()
+	else:
+		for patient_args in patient_args_list:
+			simulate_patient(*patient_args)
+
+
+# simulate one patient (tree, matrices, vcfs) into output_folder/patient<patient_idx>
+# seed (int): seed of the patient's random number generator, mutations along each tree edge get a child stream
+def simulate_patient(patient_idx, output_folder, metaFile, chrom_dict, constants_dict, seed):
+	rng = np.random.RandomState(seed)
+	n = constants_dict['num_leaves']
+	m = constants_dict['num_samples']
+	patient_folder_name = 'patient' + str(patient_idx)
+
+	# outputFolder = directory + '/sim_data' + '/' + sub_folder_name + '/' + patient_folder_name
+	outputFolder = output_folder + '/' + patient_folder_name
+
+	# clean up existing files under outputFolder
+	if os.path.exists(outputFolder):
+		shutil.rmtree(outputFolder)
+	os.makedirs(outputFolder)
+
+	l = random_get_tree(n, constants_dict['tree_model'], rng) # list
+	#print(l)
+	edge_list = get_edges(l)  ###xf: generate edges list with format of [(0,1,'r'/'l'),...]
+	#print(edge_list)
 	
-		l = random_get_tree(n) # list
-		#print(l)
-		edge_list = get_edges(l)  ###xf: generate edges list with format of [(0,1,'r'/'l'),...]
-		#print(edge_list)
-		
-		gp = gnpr.GeneProf(chrom_dict, constants_dict)
+	gp = gnpr.GeneProf(chrom_dict, constants_dict, rng)
+
+	t = Tree(edge_list, gp, seed, constants_dict['journal'])
+	#print(t.node_list, t.idx_node_dict)
 
-		t = Tree(edge_list, gp)
-		#print(t.node_list, t.idx_node_dict)
+	bp_index = gnpr.BreakpointIndex()
 
-		geneprof_list = list()
+	if constants_dict['subtree_workers'] > 0:
+		t.add_mutations_along_subtrees(bp_index, constants_dict['subtree_workers'], constants_dict['subtree_depth'])
+	else:
+		t.add_mutations_along_edges(t.rootNode, bp_index)
+	t.print_sample_stats()
+	if constants_dict['journal']:
+		t.release_geneprofs() # the nodes above --subtree_depth are still held
+		write_journal(t, outputFolder + '/journal.tsv')
+	t.summarize(n, constants_dict)
+
+	generate_t(t, 'T.dot', outputFolder)
+	#U = np.array([[1/(2*n-1)]*(2*n-1)])
+	if not constants_dict['only_leaf']:
+		U = random_get_usages(m, 2 * n - 1, rng)
+	else:
+		U_original = random_get_usages(m, n + 1, rng)
+		U = np.zeros((m, 2 * n -1))
+		U[:, :n] = U_original[:, :n]
+		U[:, -1] = U_original[:, -1]
+		print('U', U)
+
+	l, sv_cn_idx_dict = t.bp_copy_num_idx
+	r, seg_cn_idx_dict, seg_bgn_idx_dict, seg_end_idx_dict = t.seg_copy_num_idx
+	with open(outputFolder + "/dimension", 'w') as f:
+		f.write("(" + str(l) + "," + str(r) + ")")
+	### xf: combine the segment settings from both two alleles and also different node from mutations
+	bool_list = rng.choice([True, False], r)
+	if constants_dict['snv_mut_lambda'] is None:
+		C = generate_c(t, n, constants_dict, bool_list)
+		c_p, c_m = generate_seg_cp_paternal(t, n, bool_list)
+		###xf: need to be further editted
+		W, W_SV, _ = generate_w(C.get_cols(0, l), t.idx_node_dict, l, 0)
+		F, df_list = generate_f(U, C, l, 0, r, seg_cn_idx_dict, sv_cn_idx_dict, None, constants_dict['deterministic'], None,None,None, None, rng = rng)
+		a, h, mate_dict = get_a_h_mate_dict(t, n, constants_dict)
+		generate_s(metaFile, t, l, sv_cn_idx_dict, r, seg_cn_idx_dict, seg_bgn_idx_dict, seg_end_idx_dict, F, U, C,
+				   c_p, c_m, a, h, mate_dict, outputFolder, constants_dict['bgzip_vcf'])
+		output_mtx_list([('U', U), ('C', C), ('W', W), ('W_SV', W_SV), ('F', F)], outputFolder,
+						constants_dict['mtx_format'], constants_dict['sparse_mtx'])
 
-		t.add_mutations_along_edges(t.rootNode, geneprof_list)
+	else:
+		N = rng.poisson(constants_dict['read_depth'], (m, r))
+		g, snv_cn_idx_dict = t.snv_copy_num_idx
+		#print(snv_cn_idx_dict)
+		C_list, C_unsampled_snv_list, snv_sampled_idx_list, snv_unsampled_idx_list, d_list, d_unsampled_list = \
+			generate_c_snv(t, n, constants_dict, bool_list, [1], rng)
+		c_p, c_m = generate_seg_cp_paternal(t, n, bool_list)
+		F_list = []
+		F_unsampled_snv_list = []
+		a, h, mate_dict = get_a_h_mate_dict(t, n, constants_dict)
+
+		i=0
+		C = C_list[i]
+		#print(t.idx_node_dict)
+		C_mut = C.get_cols(0, l + g) ### xf: breakpoint and snv columns, nonzero only below the mutated edge
+		B, B_SV, B_SNV = generate_b(C_mut, l, g)
+		W, W_SV, W_SNV = generate_w(C_mut, t.idx_node_dict, l, g)
+		F, df_list, alt_counts_sv, alt_counts_snv, ref_counts_sv, ref_counts_snv, phylowgs_cnv_info = generate_f(U, C_list[i], l, len(snv_sampled_idx_list[i]), r, seg_cn_idx_dict, sv_cn_idx_dict,
+					   snv_cn_idx_dict, constants_dict['deterministic'], N, snv_sampled_idx_list[i], d_list[i],
+					   bool_list, constants_dict['read_depth'], rng)
+		F_list.append(F)
+		#print(F[:, (l+len(snv_sampled_idx_list[i])):])
+		F_unsampled_snv = generate_f_unsampled(U, C_unsampled_snv_list[i],
+											   C.get_cols(l + len(snv_sampled_idx_list[i]), C.shape[1]).to_dense(), r,
+											   seg_cn_idx_dict, snv_cn_idx_dict,
+											   constants_dict['deterministic'], snv_unsampled_idx_list[i],
+											   d_unsampled_list[i], bool_list, N,
+											   F[:, (l + len(snv_sampled_idx_list[i])):], rng)
+		F_unsampled_snv_list.append(F_unsampled_snv)
+		cntmd_dict, df_phylowgs_list = generate_s_snv(metaFile, t, l, sv_cn_idx_dict, r, seg_cn_idx_dict, g, snv_cn_idx_dict,
+					   snv_sampled_idx_list[i], snv_unsampled_idx_list[i], seg_bgn_idx_dict, seg_end_idx_dict, F,
+					   F_unsampled_snv, U, C_list[i], c_p, c_m, a, h, mate_dict, outputFolder, "", alt_counts_sv,
+													  alt_counts_snv, ref_counts_sv, ref_counts_snv, phylowgs_cnv_info, constants_dict['bgzip_vcf'])
+		if not os.path.exists(outputFolder + '/fastclone_input'):
+			os.mkdir(outputFolder + '/fastclone_input')
+		if not os.path.exists(outputFolder + '/pyclone_input'):
+			os.mkdir(outputFolder + '/pyclone_input')
+		if not os.path.exists(outputFolder + '/cntmd_input'):
+			os.mkdir(outputFolder + '/cntmd_input')
+		with open(outputFolder + '/cntmd_input/cntmd_dict.pickle', 'wb') as f:
+			pickle.dump(cntmd_dict, f)
+		for i in range(len(df_list)):
+			df_list[i].to_csv(outputFolder + '/fastclone_input/sample' + str(i) + '.tsv', sep='\t')
+			df_list[i]["minor_cn"] = np.round(df_list[i]["minor_cn"]).astype(int)
+			df_list[i]["major_cn"] = np.round(df_list[i]["major_cn"]).astype(int)
+			df_list[i].to_csv(outputFolder + '/pyclone_input/sample' + str(i) + '.tsv', sep='\t')
+		for i in range(len(df_phylowgs_list)):
+			df_phylowgs_list[i].to_csv(outputFolder + '/phylowgs/cnv' + str(i) + '.tsv', sep='\t', index=False)
+		output_mtx_list([('U', U), ('C', C), ('W', W), ('W_SV', W_SV), ('W_SNV', W_SNV), ('B', B), ('B_SV', B_SV),
+						 ('B_SNV', B_SNV), ('F', F)], outputFolder, constants_dict['mtx_format'], constants_dict['sparse_mtx'])
+		# output_tsv(F_unsampled_snv, '/F_unsampled_snv.tsv', outputFolder)
+		# output_tsv(C_unsampled_snv_list[i], '/C_unsampled_snv.tsv', outputFolder)
+
+	edge_list_pickle = open(outputFolder + "/edge_list.pickle", 'wb')
+	pickle.dump(edge_list, edge_list_pickle)
+	edge_list_pickle.close()
+
+
+# unpack arguments for multiprocessing.Pool.map
+def simulate_patient_star(patient_args):
+	return simulate_patient(*patient_args)
 
-		generate_t(t, 'T.dot', outputFolder)
-		#U = np.array([[1/(2*n-1)]*(2*n-1)])
-		if not constants_dict['only_leaf']:
-			U = random_get_usages(m, 2 * n - 1)
-		else:
-			U_original = random_get_usages(m, n + 1)
-			U = np.zeros((m, 2 * n -1))
-			U[:, :n] = U_original[:, :n]
-			U[:, -1] = U_original[:, -1]
-			print('U', U)
-
-		l, sv_cn_idx_dict = get_bp_copy_num_idx_dict(t, n, constants_dict)
-		r, seg_cn_idx_dict, seg_bgn_idx_dict, seg_end_idx_dict = get_seg_copy_num_idx_dict(t, n)
-		with open(outputFolder + "/dimension", 'w') as f:
-			f.write("(" + str(l) + "," + str(r) + ")")
-		### xf: combine the segment settings from both two alleles and also different node from mutations
-		bool_list = np.random.choice([True, False], r)
-		if constants_dict['snv_mut_lambda'] is None:
-			C = generate_c(t, n, constants_dict, bool_list)
-			c_p, c_m = generate_seg_cp_paternal(t, n, bool_list)
-			###xf: need to be further editted
-			W, W_SV, _ = generate_w(C, t.idx_node_dict, l, 0)
-			F, df_list = generate_f(U, C, l, 0, r, seg_cn_idx_dict, sv_cn_idx_dict, None, constants_dict['deterministic'], None,None,None, None)
-			a, h, mate_dict = get_a_h_mate_dict(t, n, constants_dict)
-			generate_s(metaFile, t, l, sv_cn_idx_dict, r, seg_cn_idx_dict, seg_bgn_idx_dict, seg_end_idx_dict, F, U, C,
-					   c_p, c_m, a, h, mate_dict, outputFolder)
-			output_tsv(U, '/U.tsv', outputFolder)
-			output_tsv(C, '/C.tsv', outputFolder)
-			output_tsv(W, '/W.tsv', outputFolder)
-			output_tsv(W_SV, '/W_SV.tsv', outputFolder)
-			output_tsv(F, '/F.tsv', outputFolder)
 
-		else:
-			N = np.random.poisson(constants_dict['read_depth'], (m, r))
-			g, snv_cn_idx_dict = get_snv_copy_num_idx_dict(t)
-			#print(snv_cn_idx_dict)
-			C_list, C_unsampled_snv_list, snv_sampled_idx_list, snv_unsampled_idx_list, d_list, d_unsampled_list = \
-				generate_c_snv(t, n, constants_dict, bool_list, [1])
-			c_p, c_m = generate_seg_cp_paternal(t, n, bool_list)
-			F_list = []
-			F_unsampled_snv_list = []
-			a, h, mate_dict = get_a_h_mate_dict(t, n, constants_dict)
-			output_tsv(U, '/U.tsv', outputFolder)
-
-			i=0
-			C = C_list[i]
-			#print(t.idx_node_dict)
-			B, B_SV, B_SNV = generate_b(C, l, g)
-			W, W_SV, W_SNV = generate_w(C, t.idx_node_dict, l, g)
-			F, df_list, alt_counts_sv, alt_counts_snv, ref_counts_sv, ref_counts_snv, phylowgs_cnv_info = generate_f(U, C_list[i], l, len(snv_sampled_idx_list[i]), r, seg_cn_idx_dict, sv_cn_idx_dict,
-						   snv_cn_idx_dict, constants_dict['deterministic'], N, snv_sampled_idx_list[i], d_list[i],
-						   bool_list, constants_dict['read_depth'])
-			F_list.append(F)
-			#print(F[:, (l+len(snv_sampled_idx_list[i])):])
-			F_unsampled_snv = generate_f_unsampled(U, C_unsampled_snv_list[i],
-												   C_list[i][:, (l + len(snv_sampled_idx_list[i])):], r,
-												   seg_cn_idx_dict, snv_cn_idx_dict,
-												   constants_dict['deterministic'], snv_unsampled_idx_list[i],
-												   d_unsampled_list[i], bool_list, N,
-												   F[:, (l + len(snv_sampled_idx_list[i])):])
-			F_unsampled_snv_list.append(F_unsampled_snv)
-			cntmd_dict, df_phylowgs_list = generate_s_snv(metaFile, t, l, sv_cn_idx_dict, r, seg_cn_idx_dict, g, snv_cn_idx_dict,
-						   snv_sampled_idx_list[i], snv_unsampled_idx_list[i], seg_bgn_idx_dict, seg_end_idx_dict, F,
-						   F_unsampled_snv, U, C_list[i], c_p, c_m, a, h, mate_dict, outputFolder, "", alt_counts_sv,
-														  alt_counts_snv, ref_counts_sv, ref_counts_snv, phylowgs_cnv_info)
-			if not os.path.exists(outputFolder + '/fastclone_input'):
-				os.mkdir(outputFolder + '/fastclone_input')
-			if not os.path.exists(outputFolder + '/pyclone_input'):
-				os.mkdir(outputFolder + '/pyclone_input')
-			if not os.path.exists(outputFolder + '/cntmd_input'):
-				os.mkdir(outputFolder + '/cntmd_input')
-			with open('cntmd_dict.pickle', 'wb') as f:
-				pickle.dump(cntmd_dict, f)
-			for i in range(len(df_list)):
-				df_list[i].to_csv(outputFolder + '/fastclone_input/sample' + str(i) + '.tsv', sep='\t')
-				df_list[i]["minor_cn"] = np.round(df_list[i]["minor_cn"]).astype(int)
-				df_list[i]["major_cn"] = np.round(df_list[i]["major_cn"]).astype(int)
-				df_list[i].to_csv(outputFolder + '/pyclone_input/sample' + str(i) + '.tsv', sep='\t')
-			for i in range(len(df_phylowgs_list)):
-				df_phylowgs_list[i].to_csv(outputFolder + '/phylowgs/cnv' + str(i) + '.tsv', sep='\t', index=False)
-			output_tsv(C, '/C.tsv', outputFolder)
-			output_tsv(W, '/W.tsv', outputFolder)
-			output_tsv(W_SV, '/W_SV.tsv', outputFolder)
-			output_tsv(W_SNV, '/W_SNV.tsv', outputFolder)
-			output_tsv(B, '/B.tsv', outputFolder)
-			output_tsv(B_SV, '/B_SV.tsv', outputFolder)
-			output_tsv(B_SNV, '/B_SNV.tsv', outputFolder)
-			output_tsv(F, '/F.tsv', outputFolder)
-			# output_tsv(F_unsampled_snv, '/F_unsampled_snv.tsv', outputFolder)
-			# output_tsv(C_unsampled_snv_list[i], '/C_unsampled_snv.tsv', outputFolder)
-
-		edge_list_pickle = open(outputFolder + "/edge_list.pickle", 'wb')
-		pickle.dump(edge_list, edge_list_pickle)
-		edge_list_pickle.close()
 # given a number n, generate all possible directed binary trees with n nodes.
 # eg. if n = 4, return [ [1,[1,[1,1]]], [1,[[1,1],1]], [[1,1],[1,1]], [[1,[1,1]],1], [[[1,1],1],1] ]
 # each 1 in the list represents a tree node.
@@ -288,24 +295,117 @@ def all_possible_trees_helper(n):
 			yield [left, right]
 
 
-# input n (number of leaves), output a random tree represented by a list.
+# input n (number of leaves) and model (str), output a random tree represented by a list.
 # tree node is represented by 1.
-def random_get_tree(n):  ###xf: select a random tree from all possible trees
-	l = all_possible_trees(n)
-	idx = random.randint(0, len(l) - 1)
-	return l[idx]
+# model: 'uniform'    uniform over all ordered binary trees with n leaves (same distribution as
+#                     picking one from all_possible_trees(n), without enumerating them)
+#        'yule'       Yule (pure birth) process, a uniformly chosen leaf splits at each step
+#        'coalescent' Kingman coalescent, a uniformly chosen pair of lineages merges at each step
+# time and memory are linear in n
+def random_get_tree(n, model = 'uniform', rng = np.random):
+	if model == 'uniform':
+		left, right, root = random_tree_uniform(n, rng)
+	elif model == 'yule':
+		left, right, root = random_tree_yule(n, rng)
+	elif model == 'coalescent':
+		left, right, root = random_tree_coalescent(n, rng)
+	else:
+		raise ValueError('unknown tree model: ' + str(model))
+	return tree_arrays_to_list(left, right, root)
+
+
+# the samplers below represent a tree with two lists, left[i] and right[i] are the children of node i.
+# leaves have left[i] == right[i] == None. return left, right and the index of the root node.
+# rng: np.random.RandomState (or the np.random module)
+
+# Remy's algorithm: grow the tree one leaf at a time, each new leaf is grafted on the edge above a
+# uniformly chosen node, on a uniformly chosen side. gives a uniform ordered binary tree.
+def random_tree_uniform(n, rng = np.random):
+	left, right, parent = [None], [None], [None]
+	root = 0
+	for i in range(1, n):
+		x = rng.randint(0, len(left)) # node whose parent edge is split
+		u, v = len(left), len(left) + 1     # new internal node and new leaf
+		if rng.randint(0, 2) == 0:
+			left += [x, None]
+			right += [v, None]
+		else:
+			left += [v, None]
+			right += [x, None]
+		p = parent[x]
+		parent += [p, u]
+		parent[x] = u
+		if p is None:
+			root = u
+		elif left[p] == x:
+			left[p] = u
+		else:
+			right[p] = u
+	return left, right, root
+
+
+def random_tree_yule(n, rng = np.random):
+	left, right = [None], [None]
+	leaves = [0]
+	for i in range(1, n):
+		k = rng.randint(0, len(leaves))
+		x = leaves[k]
+		u, v = len(left), len(left) + 1
+		left[x], right[x] = u, v
+		left += [None, None]
+		right += [None, None]
+		leaves[k] = u
+		leaves.append(v)
+	return left, right, 0
+
+
+def random_tree_coalescent(n, rng = np.random):
+	left, right = [None] * n, [None] * n
+	lineages = list(range(n))
+	while len(lineages) > 1:
+		i = rng.randint(0, len(lineages))
+		lineages[i], lineages[-1] = lineages[-1], lineages[i]
+		a = lineages.pop()
+		j = rng.randint(0, len(lineages))
+		lineages[j], lineages[-1] = lineages[-1], lineages[j]
+		b = lineages.pop()
+		lineages.append(len(left))
+		left.append(a)
+		right.append(b)
+	return left, right, lineages[0]
+
+
+# convert the left/right lists into the nested list used by get_edges, eg. [1, [1, 1]]
+def tree_arrays_to_list(left, right, root):
+	result = [None] * len(left)
+	stack = [root]
+	while stack: # post-order without recursion, children are converted before their parent
+		i = stack[-1]
+		if left[i] is None:
+			result[i] = 1
+			stack.pop()
+		elif result[left[i]] is None:
+			stack.append(left[i])
+		elif result[right[i]] is None:
+			stack.append(right[i])
+		else:
+			result[i] = [result[left[i]], result[right[i]]]
+			stack.pop()
+	return result[root]
 
 
 # input a tree (list), return number of leaves
 def get_number_of_leaves(l):
-	if l[0] == 1 and l[1] == 1:
-		return 2
-	elif l[0] == 1 and l[1] != 1:
-		return 1 + get_number_of_leaves(l[1])
-	elif [0] != 1 and l[1] == 1:
-		return 1 + get_number_of_leaves(l[0])
-	else:
-		return get_number_of_leaves(l[0]) + get_number_of_leaves(l[1])
+	count = 0
+	stack = [l]
+	while stack:
+		cur = stack.pop()
+		if cur == 1:
+			count += 1
+		else:
+			stack.append(cur[0])
+			stack.append(cur[1])
+	return count
 
 
 # given a tree (list), return list of edges(tuple). tuple format: (id, parent_id, l/r)
@@ -388,16 +488,16 @@ def get_graph_edges(edge_list):
 	return result
 
 # return a 1 by n np array sum to one
-def get_usage_for_one_patient(n):
-	a = np.random.dirichlet(np.ones(n),size = 1)
+def get_usage_for_one_patient(n, rng = np.random):
+	a = rng.dirichlet(np.ones(n),size = 1)
 	return a
 
 
 # return m by n np array, each row sum to one
-def random_get_usages(m, n):
-	a = get_usage_for_one_patient(n)
+def random_get_usages(m, n, rng = np.random):
+	a = get_usage_for_one_patient(n, rng)
 	for i in range(1, m):
-		b = get_usage_for_one_patient(n)
+		b = get_usage_for_one_patient(n, rng)
 		a = np.concatenate((a, b), axis = 0)
 	return a
 
@@ -406,7 +506,7 @@ def get_snv_copy_num_idx_dict(tree):
 	d = set()
 	d2 = {}
 	for idx in tree.node_list:
-		temp_snv_dict = tree.idx_node_dict[idx].geneProf.get_snv_dict()
+		temp_snv_dict = tree.idx_node_dict[idx].snv_dict
 
 		for tuple in temp_snv_dict.keys():
 				if tuple not in d:
@@ -418,6 +518,14 @@ def get_snv_copy_num_idx_dict(tree):
 	return len(list(d)), d2
 
 
+# input snv_idx_list (sorted array of SNV indices, as in snv_cn_idx_dict) and g (number of SNVs)
+# output an array of length g, val: column of the SNV in snv_idx_list, -1 if the SNV is not in snv_idx_list
+def get_snv_col_idx(snv_idx_list, g):
+	result = np.full(g, -1, dtype=int)
+	result[np.asarray(snv_idx_list, dtype=int)] = np.arange(len(snv_idx_list))
+	return result
+
+
 
 # input a tree (Tree object) and n (number of leaf nodes)
 # output a l (number of bps) and a dictionary
@@ -430,7 +538,7 @@ def get_bp_copy_num_idx_dict(tree, n, constants_dict):
 	d1 = dict()
 	d_chrom = {}
 	for idx in tree.node_list:
-		temp_bp_dict = tree.idx_node_dict[idx].geneProf.get_sv_read_nums_dict(constants_dict['cov'], constants_dict['read_len'])
+		temp_bp_dict = tree.idx_node_dict[idx].sv_dict
 
 		###xf: for all chromosomes for both alleles
 		for chrom in temp_bp_dict.keys():
@@ -475,7 +583,7 @@ def get_bp_copy_num_idx_dict(tree, n, constants_dict):
 def get_seg_copy_num_idx_dict(tree, n):
 	d1 = dict()
 	for idx in tree.node_list: ### xf: go through all the nodes in the tree
-		temp_copy_nums_dict = tree.idx_node_dict[idx].geneProf.get_copy_nums_dict()
+		temp_copy_nums_dict = tree.idx_node_dict[idx].copy_nums_dict
 		for chrom in temp_copy_nums_dict.keys():
 			if chrom not in d1:
 				d1[chrom] = list()
@@ -508,36 +616,45 @@ def make_2d_list(rows, cols):
 		result.append([0] * cols)
 	return result
 
-def generate_b(C, l, g):
-	C_sv_snv = C[:, : l + g]
-	B = copy.deepcopy(C_sv_snv)
-	B[B>1] = 1
-	B_sv = B[:, :l]
-	B_snv = B[:, l:(l+g)]
+# input C_mut (csc_mtx.CscMatrix): breakpoint and snv columns of C. output B, B_sv, B_snv (csc_mtx.CscMatrix)
+def generate_b(C_mut, l, g):
+	B = C_mut.with_data(np.minimum(C_mut.data, 1))
+	B_sv = B.get_cols(0, l)
+	B_snv = B.get_cols(l, l + g)
 	return B, B_sv, B_snv
 
-def generate_w(C, idx_node_dict, l, g):
-	C_sv_snv = C[:, : l+g]
-	W = np.zeros(C_sv_snv.shape)
+# input C_mut (csc_mtx.CscMatrix): breakpoint and snv columns of C. output W, W_sv, W_snv (csc_mtx.CscMatrix)
+# W[i, j] = 1 if mutation j is present in node i but not in its parent, ie. mutation j arises on the edge above node i
+def generate_w(C_mut, idx_node_dict, l, g):
+	num_nodes = C_mut.shape[0]
+	parent_row = np.full(num_nodes, -1, dtype = int)
 	for node_idx in idx_node_dict.keys():
-		if node_idx != C.shape[0]:
-			parent_idx = idx_node_dict[node_idx].parent.index
-			indices_a = np.where(C_sv_snv[node_idx-1] - C_sv_snv[parent_idx-1] > 0)[0]
-			indices_b = np.where(C_sv_snv[parent_idx-1] == 0)[0]
-			indices = np.intersect1d(indices_a, indices_b)
-			W[node_idx-1, indices] = 1
-	W_sv = W[:, :l]
+		if node_idx != num_nodes:
+			parent_row[node_idx-1] = idx_node_dict[node_idx].parent.index - 1
+	# stored entries are sorted by (col, row), so entry keys col * num_nodes + row are sorted
+	cols = C_mut.col_indices()
+	keys = cols * num_nodes + C_mut.indices
+	parent_keys = cols * num_nodes + parent_row[C_mut.indices]
+	pos = np.minimum(np.searchsorted(keys, parent_keys), max(len(keys) - 1, 0))
+	in_parent = (keys[pos] == parent_keys) if len(keys) else np.zeros(0, dtype = bool)
+	mask = (C_mut.data > 0) & (parent_row[C_mut.indices] != -1) & np.logical_not(in_parent)
+	W = C_mut.select(mask)
+	W = W.with_data(np.ones(W.nnz()))
+	W_sv = W.get_cols(0, l)
 	if g != 0:
-		W_snv = W[:, l:(l+g)]
+		W_snv = W.get_cols(l, l + g)
 	else:
 		W_snv = None
 	return W, W_sv, W_snv
 
-def generate_c_snv(tree, n, constants_dict, bool_list, subsample_list=[0, 0.0005, 0.001, 0.002]):
+def generate_c_snv(tree, n, constants_dict, bool_list, subsample_list=[0, 0.0005, 0.001, 0.002], rng=np.random):
 
-	l, sv_cn_idx_dict = get_bp_copy_num_idx_dict(tree, n, constants_dict)
-	r, seg_cn_idx_dict, seg_bgn_idx_dict, seg_end_idx_dict = get_seg_copy_num_idx_dict(tree, n)
-	g, snv_cn_idx_dict = get_snv_copy_num_idx_dict(tree)
+	l, sv_cn_idx_dict = tree.bp_copy_num_idx
+	r, seg_cn_idx_dict, seg_bgn_idx_dict, seg_end_idx_dict = tree.seg_copy_num_idx
+	g, snv_cn_idx_dict = tree.snv_copy_num_idx
+	bp_cols_dict, seg_cols_dict = get_node_cols_dicts(tree, sv_cn_idx_dict, seg_bgn_idx_dict, seg_end_idx_dict)
+	allele_perm = get_allele_perm(bool_list)
+	snv_seg_idx = get_snv_seg_idx(snv_cn_idx_dict, seg_cn_idx_dict)
 
 	c_list = []
 	c_unsampled_list = []
@@ -551,78 +668,65 @@ def generate_c_snv(tree, n, constants_dict, bool_list, subsample_list=[0, 0.0005
 	for g_sample_idx in range(len(g_subsample_list)):
 		g_sample = g_subsample_list[g_sample_idx]
 		if g_sample_idx == 0:
-			snv_sampled_idx = np.sort(np.random.choice(g, size=g_sample, replace=False))
+			snv_sampled_idx = np.sort(rng.choice(g, size=g_sample, replace=False))
 		else:
-			snv_sampled_idx = np.sort(np.append(snv_sampled_idx, np.random.choice(snv_unsampled_idx, size=g_sample - g_subsample_list[g_sample_idx -1], replace=False)))
+			snv_sampled_idx = np.sort(np.append(snv_sampled_idx, rng.choice(snv_unsampled_idx, size=g_sample - g_subsample_list[g_sample_idx -1], replace=False)))
 		snv_unsampled_idx = np.setdiff1d(np.arange(g), snv_sampled_idx)
+		snv_sampled_col = get_snv_col_idx(snv_sampled_idx, g)
+		snv_unsampled_col = get_snv_col_idx(snv_unsampled_idx, g)
 		#print(snv_unsampled_idx)
 
-		c = make_2d_list(len(tree.node_list), (l + g_sample + 2*r))
+		# breakpoint and sampled snv columns of c are collected as (row, col, copy number) entries, the segment
+		#   columns are dense
+		rows_list, cols_list, cps_list = [], [], []
+		c_seg = np.zeros((len(tree.node_list), 2*r))
 		d_sampled = np.zeros((l+g_sample))
-		c_unsampled_snv = make_2d_list(len(tree.node_list), (g-g_sample))
+		c_unsampled_snv = np.zeros((len(tree.node_list), g-g_sample), dtype=int)
 		d_unsampled = np.zeros((g-g_sample))
 		for idx in tree.node_list:
 			print("node",idx)
 			row = idx - 1
 			# add copy number for break points
-			temp_bp_dict = tree.idx_node_dict[idx].geneProf.get_sv_read_nums_dict(constants_dict['cov'], constants_dict['read_len'])
-			for chrom in temp_bp_dict:
-				for (pos, isLeft, chr_,) in temp_bp_dict[chrom]:
-					cp = temp_bp_dict[chrom][(pos, isLeft, chr_)]["copy_num"]
-					d = temp_bp_dict[chrom][(pos, isLeft, chr_)]["pm"]
-					col = sv_cn_idx_dict[chrom][(pos, isLeft, chr_)]
-					c[row][col] = cp
-					d_sampled[col] = d
-
-
+			(cols, cps, ds) = bp_cols_dict[idx]
+			rows_list.append(np.full(len(cols), row, dtype=int))
+			cols_list.append(cols)
+			cps_list.append(cps)
+			d_sampled[cols] = ds
 
 			# add copy number for segments
-			temp_copy_nums_dict = tree.idx_node_dict[idx].geneProf.get_copy_nums_dict()
-			#print(idx, "temp_copy_nums_dict", temp_copy_nums_dict)
-			for chrom in temp_copy_nums_dict:
-				(bgns, ends, cps1, cps2) = temp_copy_nums_dict[chrom]
-				for i in range(len(bgns)):
-					cp1 = cps1[i]
-					cp2 = cps2[i]
-					seg_indices_list = get_indices_for_segment(seg_bgn_idx_dict, seg_end_idx_dict, (chrom, bgns[i]), (chrom, ends[i]))
-					for j in range(len(seg_indices_list)):
-						col = seg_indices_list[j] + l + g_sample
-						if bool_list[col-l-g_sample]:
-							c[row][col] = cp1
-							c[row][col + r] = cp2
-						else:
-							c[row][col] = cp2
-							c[row][col + r] = cp1
-
-			temp_snv_dict = tree.idx_node_dict[idx].geneProf.get_snv_dict()
+			(cols, cps) = seg_cols_dict[idx]
+			c_seg[row, cols] = cps
+			c_seg[row] = c_seg[row][allele_perm]
+
+			temp_snv_dict = tree.idx_node_dict[idx].snv_dict
 			#print(idx, 'temp_snv_dict', temp_snv_dict)
-			#print(temp_copy_nums_dict)
-			print(temp_copy_nums_dict, temp_snv_dict)
-			for (chrm, pos) in temp_snv_dict.keys():
-				if snv_cn_idx_dict[(chrm, pos)] in snv_sampled_idx:
-					cn_idx = search_sv_cnv_num(chrm, pos, seg_cn_idx_dict)
-					cp = temp_snv_dict[(chrm, pos)]["copy_num"]
-
-					d = temp_snv_dict[(chrm, pos)]["pm"]
-
-					if bool_list[cn_idx]:
-						if cp > c[row][l+g+cn_idx + r*d]:
-							print("snv ", chrm, pos, "cp:", cp, "corres cnv cp:", c[row][l+g+cn_idx + r*d], c[row][l+g+cn_idx + abs(1-d)*r])
-					else:
-						if cp > c[row][l+g+cn_idx + r*abs(d-1)]:
-							print("snv ", chrm, pos, "cp:", cp, "corres cnv cp:", c[row][l+g+cn_idx + r*abs(d-1)], c[row][l+g+cn_idx + r*abs(d)])
-					col = np.where(snv_sampled_idx == snv_cn_idx_dict[(chrm, pos)])[0][0] + l
-					c[row][col] = cp
-					d_sampled[col] = d
-				else:
-					cn_idx = search_sv_cnv_num(chrm, pos, seg_cn_idx_dict)
-					cp = temp_snv_dict[(chrm, pos)]["copy_num"]
-					d = temp_snv_dict[(chrm, pos)]["pm"]
-					print("snv ", chrm, pos, "cp:", cp, "corres cnv cp:", c[row][l + g + cn_idx + r * d])
-					col = np.where(snv_unsampled_idx == snv_cn_idx_dict[(chrm, pos)])[0][0]
-					c_unsampled_snv[row][col] = cp
-					d_unsampled[col] = d
-		c_list.append(np.array(c))
+			snv_keys = list(temp_snv_dict.keys())
+			snv_ids = np.array([ snv_cn_idx_dict[key] for key in snv_keys ], dtype = int)
+			snv_cps = np.array([ temp_snv_dict[key]["copy_num"] for key in snv_keys ])
+			snv_ds = np.array([ temp_snv_dict[key]["pm"] for key in snv_keys ], dtype = int)
+			cn_idxs = snv_seg_idx[snv_ids] if len(snv_ids) else snv_ids
+			is_sampled = snv_sampled_col[snv_ids] != -1 if len(snv_ids) else snv_ids.astype(bool)
+
+			# snvs with a larger copy number than their allele of the segment
+			cnv_ds = np.where(bool_list[cn_idxs], snv_ds, 1 - snv_ds)
+			for i in np.flatnonzero(is_sampled & (snv_cps > c_seg[row, cn_idxs + r * cnv_ds])):
+				(chrm, pos) = snv_keys[i]
+				print("snv ", chrm, pos, "cp:", snv_cps[i], "corres cnv cp:", c_seg[row][cn_idxs[i] + r*cnv_ds[i]], c_seg[row][cn_idxs[i] + r*(1-cnv_ds[i])])
+			cols = snv_sampled_col[snv_ids[is_sampled]] + l
+			rows_list.append(np.full(len(cols), row, dtype=int))
+			cols_list.append(cols)
+			cps_list.append(snv_cps[is_sampled])
+			d_sampled[cols] = snv_ds[is_sampled]
+
+			for i in np.flatnonzero(~is_sampled):
+				(chrm, pos) = snv_keys[i]
+				print("snv ", chrm, pos, "cp:", snv_cps[i], "corres cnv cp:", c_seg[row][cn_idxs[i] + r * snv_ds[i]])
+			cols = snv_unsampled_col[snv_ids[~is_sampled]]
+			c_unsampled_snv[row, cols] = snv_cps[~is_sampled]
+			d_unsampled[cols] = snv_ds[~is_sampled]
+		c_mut = csc_mtx.coo_to_csc(np.concatenate(cps_list).astype(float), np.concatenate(rows_list),
+								   np.concatenate(cols_list), (len(tree.node_list), l + g_sample))
+		c_list.append(csc_mtx.hstack([c_mut, csc_mtx.dense_to_csc(c_seg)]))
 		c_unsampled_list.append(np.array(c_unsampled_snv))
 		snv_sampled_idx_list.append(snv_sampled_idx)
 		snv_unsampled_idx_list.append(snv_unsampled_idx)
@@ -633,45 +737,76 @@ def generate_c_snv(tree, n, constants_dict, bool_list, subsample_list=[0, 0.0005
 	return c_list, c_unsampled_list, snv_sampled_idx_list, snv_unsampled_idx_list, d_list, d_unsampled_list
 
 # loop through each node in tree(Tree), 
-# for each treeNode: use self.get_copy_nums_dict() to get bgns, ends, cps list for each chromosomes
-#                    use self.get_sv_read_nums_dict(cov, read_len) to get bps and their corresponding information for each chromosomes
-# output c ((2n-1)*(l+r) matrix) ### xf: --> (2n-1)*(l+2r)
+# for each treeNode: use copy_nums_dict to get bgns, ends, cps list for each chromosomes
+#                    use sv_dict to get bps and their corresponding information for each chromosomes
+# output c ((2n-1)*(l+r) matrix) ### xf: --> (2n-1)*(l+2r), as csc_mtx.CscMatrix
 def generate_c(tree, n, constants_dict, bool_list):
 
-	l, sv_cn_idx_dict = get_bp_copy_num_idx_dict(tree, n, constants_dict)
-	r, seg_cn_idx_dict, seg_bgn_idx_dict, seg_end_idx_dict = get_seg_copy_num_idx_dict(tree, n)
+	l, sv_cn_idx_dict = tree.bp_copy_num_idx
+	r, seg_cn_idx_dict, seg_bgn_idx_dict, seg_end_idx_dict = tree.seg_copy_num_idx
 
 
-	c = make_2d_list(len(tree.node_list), (l + 2*r))
+	bp_cols_dict, seg_cols_dict = get_node_cols_dicts(tree, sv_cn_idx_dict, seg_bgn_idx_dict, seg_end_idx_dict)
+	rows_list, cols_list, cps_list = [], [], []
+	c_seg = np.zeros((len(tree.node_list), 2*r))
 	for idx in tree.node_list:
 		row = idx - 1
 		# add copy number for break points
-		temp_bp_dict = tree.idx_node_dict[idx].geneProf.get_sv_read_nums_dict(constants_dict['cov'], constants_dict['read_len'])
-		for chrom in temp_bp_dict:
-			for (pos, isLeft, chr_,) in temp_bp_dict[chrom]:
-				cp = temp_bp_dict[chrom][(pos, isLeft, chr_)]["copy_num"]
-				col = sv_cn_idx_dict[chrom][(pos, isLeft, chr_)]
-				c[row][col] = cp
+		(cols, cps, ds) = bp_cols_dict[idx]
+		rows_list.append(np.full(len(cols), row, dtype=int))
+		cols_list.append(cols)
+		cps_list.append(cps)
 
 		# add copy number for segments
-		temp_copy_nums_dict = tree.idx_node_dict[idx].geneProf.get_copy_nums_dict()
+		(cols, cps) = seg_cols_dict[idx]
+		c_seg[row, cols] = cps
+
+	# put the allele chosen by bool_list into the first r segment columns
+	c_seg = c_seg[:, get_allele_perm(bool_list)]
+	c_mut = csc_mtx.coo_to_csc(np.concatenate(cps_list).astype(float), np.concatenate(rows_list),
+							   np.concatenate(cols_list), (len(tree.node_list), l))
+	return csc_mtx.hstack([c_mut, csc_mtx.dense_to_csc(c_seg)])
+
+
+# output two dictionaries, key: node index
+# bp_cols_dict val: (cols, cps, ds) arrays of bp column indices and their copy numbers and pm
+# seg_cols_dict val: (cols, cps) arrays of segment column indices (0 to 2r-1, first allele then second allele) and their copy numbers
+#   (floats, as combined by ccn.combine_copy_nums_allelic, so C stays a float matrix)
+def get_node_cols_dicts(tree, sv_cn_idx_dict, seg_bgn_idx_dict, seg_end_idx_dict):
+	r = len(seg_bgn_idx_dict)
+	bp_cols_dict = dict()
+	seg_cols_dict = dict()
+	for idx in tree.node_list:
+		temp_bp_dict = tree.idx_node_dict[idx].sv_dict
+		cols, cps, ds = list(), list(), list()
+		for chrom in temp_bp_dict:
+			for key in temp_bp_dict[chrom]:
+				cols.append(sv_cn_idx_dict[chrom][key])
+				cps.append(temp_bp_dict[chrom][key]["copy_num"])
+				ds.append(temp_bp_dict[chrom][key]["pm"])
+		bp_cols_dict[idx] = (np.array(cols, dtype=int), np.array(cps, dtype=int), np.array(ds, dtype=int))
+
+		temp_copy_nums_dict = tree.idx_node_dict[idx].copy_nums_dict
+		cols_list, cps_list = [np.zeros(0, dtype=int)], [np.zeros(0)]
 		for chrom in temp_copy_nums_dict:
 			(bgns, ends, cps1, cps2) = temp_copy_nums_dict[chrom]
-			for i in range(len(bgns)):
-				cp1 = cps1[i]
-				cp2 = cps2[i]
-				seg_indices_list = get_indices_for_segment(seg_bgn_idx_dict, seg_end_idx_dict, (chrom, bgns[i]), (chrom, ends[i]))
-				for j in range(len(seg_indices_list)):
-					col = seg_indices_list[j] + l
-					if bool_list[col - l]:
-						c[row][col] = cp1
-						c[row][col + r] = cp2
-					else:
-						c[row][col] = cp2
-						c[row][col + r] = cp1
+			firsts = np.array([seg_bgn_idx_dict[(chrom, bgn)] for bgn in bgns], dtype=int)
+			lasts = np.array([seg_end_idx_dict[(chrom, end)] for end in ends], dtype=int)
+			reps = lasts - firsts + 1
+			# the combined segments firsts[i] .. lasts[i] all take the copy numbers of segment i
+			cols = np.arange(reps.sum()) + np.repeat(firsts - np.cumsum(reps) + reps, reps)
+			cols_list.extend([cols, cols + r])
+			cps_list.extend([np.repeat(np.array(cps1, dtype=float), reps), np.repeat(np.array(cps2, dtype=float), reps)])
+		seg_cols_dict[idx] = (np.concatenate(cols_list), np.concatenate(cps_list))
+	return bp_cols_dict, seg_cols_dict
 
-	result = np.array(c)
-	return result
+
+# column permutation of the 2r segment columns: column j (j < r) takes the first allele if bool_list[j] else the second,
+#   column j + r takes the other one
+def get_allele_perm(bool_list):
+	r = len(bool_list)
+	first = np.where(np.asarray(bool_list, dtype=bool), np.arange(r), np.arange(r) + r)
+	return np.concatenate((first, (first + r) % (2 * r)))
 
 
 
@@ -689,15 +824,14 @@ def get_indices_for_segment(bgn2idx, end2idx, s, e):
 # return a ((2n-1) * r) matrix contains paternal chrom copy number for each segment
 # and a ((2n-1) * r) matrix contains maternal chrom copy number for each segment
 def generate_seg_cp_paternal(tree, n, bool_list):
-	r, seg_cn_idx_dict, seg_bgn_idx_dict, seg_end_idx_dict = get_seg_copy_num_idx_dict(tree, n)
+	r, seg_cn_idx_dict, seg_bgn_idx_dict, seg_end_idx_dict = tree.seg_copy_num_idx
 	c_p = make_2d_list(len(tree.node_list), r)
 	c_m = make_2d_list(len(tree.node_list), r)
 	for idx in tree.node_list:
 		row = idx - 1
-		temp_chrom_dict = tree.idx_node_dict[idx].geneProf.chrom_dict
-		# temp_copy_nums_dict = tree.idx_node_dict[idx].geneProf.get_copy_nums_dict()
-		for chrom in list(filter(lambda x: x[1] == 0, temp_chrom_dict.keys())):
-			(bgns, ends, cps) = temp_chrom_dict[chrom].get_copy_nums()
+		allele_copy_nums_dict = tree.idx_node_dict[idx].allele_copy_nums_dict
+		for chrom in list(filter(lambda x: x[1] == 0, allele_copy_nums_dict.keys())):
+			(bgns, ends, cps) = allele_copy_nums_dict[chrom]
 			for i in range(len(bgns)):
 				cp = cps[i]
 				seg_indices_list = get_indices_for_segment(seg_bgn_idx_dict, seg_end_idx_dict, (chrom[0], bgns[i]), (chrom[0], ends[i]))
@@ -707,8 +841,8 @@ def generate_seg_cp_paternal(tree, n, bool_list):
 					else:
 						c_m[row][col] = cp
 
-		for chrom in list(filter(lambda x: x[1] == 1, temp_chrom_dict.keys())):
-			(bgns, ends, cps) = temp_chrom_dict[chrom].get_copy_nums()
+		for chrom in list(filter(lambda x: x[1] == 1, allele_copy_nums_dict.keys())):
+			(bgns, ends, cps) = allele_copy_nums_dict[chrom]
 			for i in range(len(bgns)):
 				cp = cps[i]
 				seg_indices_list = get_indices_for_segment(seg_bgn_idx_dict, seg_end_idx_dict, (chrom[0], bgns[i]), (chrom[0], ends[i]))
@@ -721,118 +855,121 @@ def generate_seg_cp_paternal(tree, n, bool_list):
 
 # given u (m * (2n-1) matrix) and c ((2n-1)*(l+r) matrix), output f (m * (l+r) matrix)
 ### xf: deterministic f vs. generative f
-def generate_f(u, c, l, g, r, seg_cn_idx_dict, sv_cn_idx_dict, snv_cn_idx_dict, det, N, snv_idx_list, d, bool_list, read_depth):
+# c (csc_mtx.CscMatrix)
+def generate_f(u, c, l, g, r, seg_cn_idx_dict, sv_cn_idx_dict, snv_cn_idx_dict, det, N, snv_idx_list, d, bool_list, read_depth, rng=np.random):
 	#print(u.shape, c.shape)
 	#print(seg_cn_idx_dict, sv_cn_idx_dict, snv_cn_idx_dict, det, N, snv_idx_list, d, bool_list)
 	print(l, g, r, c.shape)
 	print(d)
-	print(c)
 	if det:
-		return np.dot(u, c)
+		return c.left_dot(u)
 	else:
 
-		df_pyclone_list = []
-		for i in range(u.shape[0]):
-			df_pyclone = pd.DataFrame(columns=['mutation_id','ref_counts','var_counts','normal_cn','minor_cn','major_cn'])
-			df_pyclone_list.append(df_pyclone)
-		F_true = np.dot(u, c)
-		print(c[:,l+g:])
+		F_true = c.left_dot(u)
+		c_seg = c.get_cols(l+g, c.shape[1]).to_dense()
+		print(c_seg)
 		F_gen = np.zeros((F_true.shape))
 		m = F_true.shape[0]
 		A_sv, R_sv, A_snv,R_snv = np.zeros((m, l)), np.zeros((m, l)), np.zeros((m, g)), np.zeros((m, g))
-		N = np.random.poisson(read_depth * F_true[:, l+g:])
+		N = rng.poisson(read_depth * F_true[:, l+g:])
 		sv_tuple_list = []
 		#print("seg_cn_idx_dict", seg_cn_idx_dict)
 		for chrom in sv_cn_idx_dict.keys():
 			for pos_tuple in sv_cn_idx_dict[chrom].keys():
 				sv_tuple_list.append((chrom, pos_tuple[0],sv_cn_idx_dict[chrom][pos_tuple]))
 		sv_tuple_list = sorted(sv_tuple_list, key=lambda a: a[2])
+		sv_seg_idx = search_sv_cnv_nums([sv_chr for (sv_chr, sv_pos, sv_idx) in sv_tuple_list],
+										[sv_pos for (sv_chr, sv_pos, sv_idx) in sv_tuple_list], get_seg_search_dict(seg_cn_idx_dict))
 		snv_tuple_list = list(snv_cn_idx_dict.items())
+		snv_seg_idx = get_snv_seg_idx(snv_cn_idx_dict, seg_cn_idx_dict)
 		n, _ = c.shape
 		### generate F for CNVs with randomness
-		phylowgs_cnv_info = np.zeros((m, r, 3))
-		for i in range(0, r):
-			#print(F_true[:, l+g+i]/(F_true[:, l+g+i] + F_true[:, l+g+i+r]))
-			F_gen[:, l+g+i] = N[:, i]/read_depth
-			F_gen[:, l+g+r+i] = N[:,i+r]/read_depth
-			print(i, c[:,l+g+i], c[:,l+g+r+i])
-			if np.all(c[:,l+g+i] == 1) and np.all(c[:,l+g+r+i] == 1):
-				print("1")
-				phylowgs_cnv_info[:, i, 0] = 1
-				phylowgs_cnv_info[:, i, 1] = 1
-				phylowgs_cnv_info[:, i, 2] = 1
-			else:
-				if not np.all(c[:,l+g+i] == 1):
-					if np.max(c[:,l+g+i]) > 1:
-						print("2")
-						phylowgs_cnv_info[:, i, 0] = np.max(c[:,l+g+i])
-						phylowgs_cnv_info[:, i, 1] = np.round(np.mean(c[:, l+g+r+i][np.where(c[:, l+g+i] != 1)])).astype(int)
-						phylowgs_cnv_info[:, i, 2] = np.sum(u[:,np.where(c[:, l+g+i] != 1)[0]], axis=1)
-					elif np.min(c[:,l+g+i]) < 1:
-						print("3")
-						phylowgs_cnv_info[:, i, 0] = np.round(np.mean(c[:, l+g+r+i][np.where(c[:, l+g+i] != 1)])).astype(int)
-						phylowgs_cnv_info[:, i, 1] = np.min(c[:,l+g+i])
-						phylowgs_cnv_info[:, i, 2] = np.sum(u[:,np.where(c[:, l+g+i] != 1)[0]], axis=1)
-				elif not np.all(c[:,l+g+r+i] == 1):
-					if np.max(c[:,l+g+r+i]) > 1:
-						print("4")
-						phylowgs_cnv_info[:, i, 0] = np.max(c[:,l+g+r+i])
-						phylowgs_cnv_info[:, i, 1] = np.round(np.mean(c[:, l+g+i][np.where(c[:, l+g+r+i] != 1)])).astype(int)
-						phylowgs_cnv_info[:, i, 2] = np.sum(u[:,np.where(c[:, l+g+r+i] != 1)[0]], axis=1)
-					elif np.min(c[:,l+g+r+i]) < 1:
-						print("5")
-						phylowgs_cnv_info[:, i, 0] = np.round(np.mean(c[:, l+g+i][np.where(c[:, l+g+r+i] != 1)])).astype(int)
-						phylowgs_cnv_info[:, i, 1] = np.min(c[:,l+g+r+i])
-						phylowgs_cnv_info[:, i, 2] = np.sum(u[:,np.where(c[:, l+g+r+i] != 1)[0]], axis=1)
+		F_gen[:, l+g:] = N/read_depth
+		phylowgs_cnv_info = get_phylowgs_cnv_info(u, c_seg[:, :r], c_seg[:, r:])
+
 		### generate F for SVs with randomness, given the generated CNVs
-		for (sv_chr, sv_pos, sv_idx) in sv_tuple_list:
-			cnv_idx = search_sv_cnv_num(sv_chr, sv_pos, seg_cn_idx_dict)
-			adj_cnv_idx = cnv_idx + int(int(d[sv_idx]) == int(bool_list[cnv_idx]))*r
-			adj_cnv_idx_a = cnv_idx + int(int(d[sv_idx]) != int(bool_list[cnv_idx])) * r
-			#print("p", F_true[:, sv_idx],F_true[:, l+g+adj_cnv_idx])
-			N_sv = np.random.binomial(N[:,adj_cnv_idx], F_true[:, sv_idx]/(F_true[:, l+g+adj_cnv_idx]))
-			ref_counts_sv = np.round(N[:,adj_cnv_idx] + N[:,adj_cnv_idx_a] - N_sv).astype(int)
-			A_sv[:, sv_idx] = N_sv
-			R_sv[:, sv_idx] = ref_counts_sv
-			for index in range(len(df_pyclone_list)):
-				df_pyclone_list[index] = df_pyclone_list[index].append({'mutation_id': 'sv' + str(sv_idx), 'ref_counts': ref_counts_sv[index], 'var_counts': N_sv[index], \
-							   'normal_cn': 2, 'minor_cn': min(F_gen[index,l+g+adj_cnv_idx], F_gen[index,l+g+adj_cnv_idx_a]), \
-							'major_cn': max(F_gen[index,l+g+adj_cnv_idx], F_gen[index,l+g+adj_cnv_idx_a])}, ignore_index=True)
-			F_gen[:, sv_idx] = N_sv/read_depth
-		for i in range(0, len(snv_tuple_list)):
-			(snv_chr, snv_pos), snv_idx = snv_tuple_list[i]
-			if snv_idx in snv_idx_list:
-				snv_new_idx = np.where(snv_idx_list == snv_idx)[0][0]
-				#print(snv_new_idx, snv_pos,)
-				cnv_idx = search_sv_cnv_num(snv_chr, snv_pos, seg_cn_idx_dict)
-				adj_cnv_idx = cnv_idx + int(int(d[l+snv_new_idx]) == int(bool_list[cnv_idx])) * r
-				#print(c[:, l + g + adj_cnv_idx])
-				adj_cnv_idx_a = cnv_idx + int(int(d[l+snv_new_idx]) != int(bool_list[cnv_idx])) * r
-				#print("p", F_true[:, l + snv_new_idx], F_true[:, l + g + adj_cnv_idx], F_true[:, l + g + adj_cnv_idx_a] )
-				N_snv = np.random.binomial(N[:,adj_cnv_idx], F_true[:, l+snv_new_idx]/F_true[:, l+g+adj_cnv_idx])
-				ref_counts_snv = np.round((F_true[:, l + g + adj_cnv_idx] + F_true[:, l + g + adj_cnv_idx_a]) * N[:, cnv_idx] - N_snv).astype(int)
-				F_gen[:, l + snv_new_idx] = N_snv/read_depth
-				A_snv[:, snv_new_idx] = N_snv
-				R_snv[:, snv_new_idx] = ref_counts_snv
-				for index in range(len(df_pyclone_list)):
-					df_pyclone_list[index] = df_pyclone_list[index].append(
-						{'mutation_id': 'snv' + str(snv_idx), 'ref_counts': ref_counts_snv[index], 'var_counts': N_snv[index], \
-						 'normal_cn': 2, 'minor_cn': min(F_gen[index, l + g + adj_cnv_idx], F_gen[index, l + g + adj_cnv_idx_a]), \
-						 'major_cn': max(F_gen[index, l + g + adj_cnv_idx], F_gen[index, l + g + adj_cnv_idx_a])}, ignore_index=True)
+		# binomial draws are made over (variant, sample) matrices, which consumes the random stream in the same
+		#   order as drawing variant by variant
+		sv_idx_arr = np.array([sv_idx for (sv_chr, sv_pos, sv_idx) in sv_tuple_list], dtype=int)
+		(sv_adj, sv_adj_a) = get_adj_cnv_idx(sv_seg_idx, d[sv_idx_arr], bool_list, r)
+		N_sv = rng.binomial(N[:, sv_adj].T, (F_true[:, sv_idx_arr]/F_true[:, l+g+sv_adj]).T).T
+		ref_counts_sv = np.round(N[:, sv_adj] + N[:, sv_adj_a] - N_sv).astype(int)
+		A_sv[:, sv_idx_arr] = N_sv
+		R_sv[:, sv_idx_arr] = ref_counts_sv
+		F_gen[:, sv_idx_arr] = N_sv/read_depth
+
+		### generate F for sampled SNVs, in the order of snv_tuple_list
+		snv_col = get_snv_col_idx(snv_idx_list, len(snv_tuple_list))
+		snv_idx_arr = np.array([snv_idx for (snv_key, snv_idx) in snv_tuple_list], dtype=int)
+		snv_idx_arr = snv_idx_arr[snv_col[snv_idx_arr] != -1]
+		snv_new_idx = snv_col[snv_idx_arr]
+		snv_cnv_idx = snv_seg_idx[snv_idx_arr]
+		(snv_adj, snv_adj_a) = get_adj_cnv_idx(snv_cnv_idx, d[l+snv_new_idx], bool_list, r)
+		N_snv = rng.binomial(N[:, snv_adj].T, (F_true[:, l+snv_new_idx]/F_true[:, l+g+snv_adj]).T).T
+		ref_counts_snv = np.round((F_true[:, l + g + snv_adj] + F_true[:, l + g + snv_adj_a]) * N[:, snv_cnv_idx] - N_snv).astype(int)
+		F_gen[:, l + snv_new_idx] = N_snv/read_depth
+		A_snv[:, snv_new_idx] = N_snv
+		R_snv[:, snv_new_idx] = ref_counts_snv
+
+		# one pyclone table per sample, all SVs then the sampled SNVs, built column by column
+		mutation_ids = ['sv' + str(sv_idx) for sv_idx in sv_idx_arr] + ['snv' + str(snv_idx) for snv_idx in snv_idx_arr]
+		adj_cn, adj_cn_a = F_gen[:, l+g+np.append(sv_adj, snv_adj)], F_gen[:, l+g+np.append(sv_adj_a, snv_adj_a)]
+		ref_counts = np.append(ref_counts_sv, ref_counts_snv, axis=1)
+		var_counts = np.append(N_sv, N_snv, axis=1)
+		df_pyclone_list = []
+		for index in range(m):
+			df_pyclone = pd.DataFrame({'mutation_id': mutation_ids, 'ref_counts': ref_counts[index], 'var_counts': var_counts[index],
+									   'normal_cn': np.full(len(mutation_ids), 2, dtype=int), 'minor_cn': np.minimum(adj_cn[index], adj_cn_a[index]),
+									   'major_cn': np.maximum(adj_cn[index], adj_cn_a[index])},
+									  columns=['mutation_id','ref_counts','var_counts','normal_cn','minor_cn','major_cn'])
+			df_pyclone_list.append(df_pyclone)
 		#print(np.sqrt(np.mean(np.square(F_gen - F_true))))
 		#print(df_pyclone_list)
 		# reorder the allelic specific CNs of F and corresponding C
-		for i in range(0, r):
-			#print(F_true[:, l+g+i]/(F_true[:, l+g+i] + F_true[:, l+g+i+r]))
-			for j in range(F_gen.shape[0]):
-				if F_gen[j, l+g+i] < F_gen[j, l+g+r+i]:
-					temp = F_gen[j, l+g+i]
-					F_gen[j, l+g+i] = F_gen[j, l+g+r+i]
-					F_gen[j, l+g+r+i] = temp
+		cn_a, cn_b = F_gen[:, l+g:l+g+r].copy(), F_gen[:, l+g+r:].copy()
+		is_swapped = cn_a < cn_b
+		F_gen[:, l+g:l+g+r] = np.where(is_swapped, cn_b, cn_a)
+		F_gen[:, l+g+r:] = np.where(is_swapped, cn_a, cn_b)
 		return F_gen, df_pyclone_list, A_sv, A_snv, R_sv, R_snv, phylowgs_cnv_info
 
 
-def generate_f_unsampled(u, c, c_cn, r, seg_cn_idx_dict, snv_cn_idx_dict, det, snv_un_idx_list, d_unsampled, bool_list, N, F_gen_cn):
+# input cnv_idx (array of segment indices of variants), d (array of their pm) and bool_list
+# output arrays adj_cnv_idx and adj_cnv_idx_a, the columns (0 to 2r-1) of the variants' allele and of the other allele
+def get_adj_cnv_idx(cnv_idx, d, bool_list, r):
+	is_first = np.asarray(d).astype(int) == np.asarray(bool_list)[cnv_idx].astype(int)
+	return cnv_idx + is_first * r, cnv_idx + (~is_first) * r
+
+
+# input u (m * (2n-1) matrix), c_a and c_b ((2n-1) * r matrices, copy numbers of the two alleles of each segment)
+# output phylowgs_cnv_info (m * r * 3 array), major cn, minor cn and cellular prevalence of each segment in each sample
+def get_phylowgs_cnv_info(u, c_a, c_b):
+	m, r = u.shape[0], c_a.shape[1]
+	phylowgs_cnv_info = np.zeros((m, r, 3))
+	all_a, all_b = np.all(c_a == 1, axis=0), np.all(c_b == 1, axis=0)
+	phylowgs_cnv_info[:, all_a & all_b, :] = 1
+	# a segment is summarized by its first changed allele: its max (gain) or min (loss) over the nodes,
+	#   and the rounded mean of the other allele over the nodes where it is changed
+	for (changed, other, is_case) in [(c_a, c_b, ~all_a), (c_b, c_a, all_a & ~all_b)]:
+		is_changed = changed != 1
+		num_changed = np.maximum(np.sum(is_changed, axis=0), 1)
+		mean_other = np.round(np.sum(np.where(is_changed, other, 0), axis=0) / num_changed).astype(int)
+		max_changed, min_changed = np.max(changed, axis=0), np.min(changed, axis=0)
+		is_gain = is_case & (max_changed > 1)
+		is_loss = is_case & ~is_gain & (min_changed < 1)
+		phylowgs_cnv_info[:, is_gain, 0] = max_changed[is_gain]
+		phylowgs_cnv_info[:, is_gain, 1] = mean_other[is_gain]
+		phylowgs_cnv_info[:, is_loss, 0] = mean_other[is_loss]
+		phylowgs_cnv_info[:, is_loss, 1] = min_changed[is_loss]
+		# cellular prevalence: total usage of the changed nodes, summed once per distinct set of changed nodes
+		cols = np.where(is_gain | is_loss)[0]
+		if len(cols) > 0:
+			patterns, inverse = np.unique(is_changed[:, cols].T, axis=0, return_inverse=True)
+			for k in range(len(patterns)):
+				phylowgs_cnv_info[:, cols[inverse == k], 2] = np.sum(u[:, np.where(patterns[k])[0]], axis=1)[:, np.newaxis]
+	return phylowgs_cnv_info
+
+
+def generate_f_unsampled(u, c, c_cn, r, seg_cn_idx_dict, snv_cn_idx_dict, det, snv_un_idx_list, d_unsampled, bool_list, N, F_gen_cn, rng=np.random):
 	print(u.shape, c.shape)
 
 	if det:
@@ -845,26 +982,58 @@ def generate_f_unsampled(u, c, c_cn, r, seg_cn_idx_dict, snv_cn_idx_dict, det, s
 		snv_tuple_list = list(snv_cn_idx_dict.items())
 		n, _ = c.shape
 		### generate F for SVs with randomness
+		snv_col = get_snv_col_idx(snv_un_idx_list, len(snv_tuple_list))
+		snv_seg_idx = get_snv_seg_idx(snv_cn_idx_dict, seg_cn_idx_dict)
 		for i in range(0, len(snv_tuple_list)):
 			(snv_chr, snv_pos), snv_idx = snv_tuple_list[i]
-			if snv_idx in snv_un_idx_list:
-				snv_new_idx = np.where(snv_un_idx_list == snv_idx)[0][0]
-				cnv_idx = search_sv_cnv_num(snv_chr, snv_pos, seg_cn_idx_dict)
+			snv_new_idx = snv_col[snv_idx]
+			if snv_new_idx != -1:
+				cnv_idx = snv_seg_idx[snv_idx]
 				adj_cnv_idx = cnv_idx + int(int(d_unsampled[snv_new_idx]) == int(bool_list[cnv_idx])) * r
 				#print(F_true_unsampled[:, snv_new_idx], F_true_cn[:,adj_cnv_idx])
 				if F_true_unsampled[:, snv_new_idx] > F_true_cn[:,adj_cnv_idx]:
 					F_true_unsampled[:, snv_new_idx] - 1
-				F_gen_unsampled[:, snv_new_idx] = np.random.binomial((F_gen_cn[:, adj_cnv_idx] * N[:, cnv_idx]).astype(int),
+				F_gen_unsampled[:, snv_new_idx] = rng.binomial((F_gen_cn[:, adj_cnv_idx] * N[:, cnv_idx]).astype(int),
 				F_true_unsampled[:, snv_new_idx] / F_true_cn[:,adj_cnv_idx]) / N[:,cnv_idx]
 
 				# F_gen[:, snv_new_idx] = np.random.binomial(N, F_true[:, snv_new_idx]/(F_cn[:, cnv_idx] + F_cn[:, cnv_idx+r]))/(N*(F_cn[:, cnv_idx] + F_cn[:, cnv_idx+r]))
 		return F_gen_unsampled
 
 
-def search_sv_cnv_num(sv_chr, sv_pos, seg_cn_idx_dict):
-	for (bgn, end), cnv_idx in seg_cn_idx_dict[sv_chr].items():
-		if bgn <= sv_pos <= end:
-			return cnv_idx
+# input seg_cn_idx_dict (output of get_seg_copy_num_idx_dict)
+# output a dictionary
+# key: chrom
+# val: (bgns, idxs) arrays of the segments of chrom sorted by bgn
+def get_seg_search_dict(seg_cn_idx_dict):
+	result = dict()
+	for chrom in seg_cn_idx_dict:
+		items = sorted(seg_cn_idx_dict[chrom].items())
+		result[chrom] = (np.array([bgn for ((bgn, end), idx) in items], dtype=int), np.array([idx for (key, idx) in items], dtype=int))
+	return result
+
+
+# input chroms and poss (lists of the chromosomes and positions of bps or snvs) and seg_search_dict (output of get_seg_search_dict)
+# output an array of the indices of the segments containing each position
+def search_sv_cnv_nums(chroms, poss, seg_search_dict):
+	result = np.zeros(len(poss), dtype=int)
+	chrom_rows_dict = dict()
+	for i in range(len(chroms)):
+		chrom_rows_dict.setdefault(chroms[i], []).append(i)
+	poss = np.asarray(poss, dtype=int)
+	for chrom in chrom_rows_dict:
+		rows = np.array(chrom_rows_dict[chrom], dtype=int)
+		(bgns, idxs) = seg_search_dict[chrom]
+		# segments of a chromosome are contiguous, so the last segment starting at or before pos contains it
+		result[rows] = idxs[np.searchsorted(bgns, poss[rows], side='right') - 1]
+	return result
+
+
+# input snv_cn_idx_dict and seg_cn_idx_dict
+# output an array of length g, val: index of the segment containing the SNV
+def get_snv_seg_idx(snv_cn_idx_dict, seg_cn_idx_dict):
+	snv_list = sorted(snv_cn_idx_dict.items(), key=lambda x: x[1])
+	return search_sv_cnv_nums([chrm for ((chrm, pos), idx) in snv_list], [pos for ((chrm, pos), idx) in snv_list],
+							  get_seg_search_dict(seg_cn_idx_dict))
 
 # return matrix a, matrix h, and dictionary mate_dict
 # matrix a: a ((2n-1) * l) matrix contains mated_reads info
@@ -873,14 +1042,13 @@ def search_sv_cnv_num(sv_chr, sv_pos, seg_cn_idx_dict):
 #           key: (chrom, pos, isLeft)
 #           val: (mate_chrom, mate_pos, mate_isLeft)
 def get_a_h_mate_dict(tree, n, constants_dict):
-	l, sv_cn_idx_dict = get_bp_copy_num_idx_dict(tree, n, constants_dict)
+	l, sv_cn_idx_dict = tree.bp_copy_num_idx
 	a, h = make_2d_list(len(tree.node_list), l), make_2d_list(len(tree.node_list), l)
 
 	mate_dict = {}
 	for node_name in tree.node_list:
 		#print("node",node_name)
-		gene_prof = tree.idx_node_dict[node_name].geneProf
-		sv_dict = gene_prof.get_sv_read_nums_dict(constants_dict['cov'], constants_dict['read_len'])
+		sv_dict = tree.idx_node_dict[node_name].sv_dict
 		for chrm in sv_dict.keys():
 			#print("ch",chrm)
 			for cur_pos, cur_is_left, cur_chr in sv_dict[chrm]:
@@ -911,10 +1079,127 @@ def get_a_h_mate_dict(tree, n, constants_dict):
 				h[node_name - 1][j] = sv_dict[chrm][(cur_pos, cur_is_left, cur_chr)]['total_reads']
 	return a, h, mate_dict
 
-# given a matrix, save as tsv file
+# given a matrix (np.array or csc_mtx.CscMatrix), save as tsv file. a CscMatrix is written a block of rows at a time
 def output_tsv(mtx, output_file, output_folder):
 	with open(output_folder + output_file, "w") as f:
-		f.write("\n".join("\t".join(map(str, x)) for x in mtx))
+		if not isinstance(mtx, csc_mtx.CscMatrix):
+			f.write("\n".join("\t".join(map(str, x)) for x in mtx))
+			return
+		for (bgn, end, block) in mtx.iter_row_blocks():
+			if bgn > 0:
+				f.write("\n")
+			f.write("\n".join("\t".join(map(str, x)) for x in block))
+
+
+# given a matrix (np.array or csc_mtx.CscMatrix), save as npy file. a CscMatrix is filled into the file a block
+#   of rows at a time, so it is never dense in memory as a whole
+def output_npy(mtx, filename):
+	if not isinstance(mtx, csc_mtx.CscMatrix):
+		np.save(filename, np.asarray(mtx))
+		return
+	arr = np.lib.format.open_memmap(filename, mode = 'w+', dtype = mtx.data.dtype, shape = mtx.shape)
+	for (bgn, end, block) in mtx.iter_row_blocks():
+		arr[bgn:end] = block
+	arr.flush()
+	del arr
+
+
+# given mtx_list (list of (name, matrix)), save as one npz file keyed by name, staging each matrix as npy file
+def output_npz(mtx_list, filename):
+	zipf = zipfile.ZipFile(filename, mode = 'w', compression = zipfile.ZIP_STORED, allowZip64 = True)
+	(fd, tmp_file) = tempfile.mkstemp(suffix = '-numpy.npy')
+	os.close(fd)
+	try:
+		for (name, mtx) in mtx_list:
+			output_npy(mtx, tmp_file)
+			zipf.write(tmp_file, arcname = name + '.npy')
+	finally:
+		os.remove(tmp_file)
+		zipf.close()
+
+
+# mtx_list: list of (name, matrix), matrix is np.array or csc_mtx.CscMatrix. mtx_format: 'tsv', 'npy' or 'npz'
+# tsv: one <name>.tsv per matrix
+# npy: one <name>.npy per matrix, loadable column by column with np.load(file, mmap_mode = 'r')
+# npz: all matrices in one matrices.npz keyed by name
+# sparse: each CscMatrix is written only as <name>.csc.npz (scipy.sparse.load_npz format) and never made dense,
+#   the np.arrays are written in mtx_format
+# npy and npz also write manifest.tsv listing file, key, shape and dtype of each matrix
+def output_mtx_list(mtx_list, output_folder, mtx_format = 'tsv', sparse = False):
+	if mtx_format not in ['tsv', 'npy', 'npz']:
+		raise ValueError('unknown matrix format ' + str(mtx_format))
+	file_dict = dict()
+	if sparse:
+		for (name, mtx) in mtx_list:
+			if isinstance(mtx, csc_mtx.CscMatrix):
+				mtx.save(output_folder + '/' + name + '.csc.npz')
+				file_dict[name] = name + '.csc.npz'
+	dense_list = [ (name, mtx) for (name, mtx) in mtx_list if name not in file_dict ]
+	if mtx_format == 'tsv':
+		for (name, mtx) in dense_list:
+			output_tsv(mtx, '/' + name + '.tsv', output_folder)
+		return
+	if mtx_format == 'npy':
+		for (name, mtx) in dense_list:
+			output_npy(mtx, output_folder + '/' + name + '.npy')
+			file_dict[name] = name + '.npy'
+	else:
+		output_npz(dense_list, output_folder + '/matrices.npz')
+		for (name, mtx) in dense_list:
+			file_dict[name] = 'matrices.npz'
+	with open(output_folder + '/manifest.tsv', 'w') as f:
+		f.write('name\tfile\tnum_rows\tnum_cols\tdtype\n')
+		for (name, mtx) in mtx_list:
+			dtype = mtx.data.dtype if isinstance(mtx, csc_mtx.CscMatrix) else np.asarray(mtx).dtype
+			shape = mtx.shape if len(mtx.shape) > 1 else (mtx.shape[0], 1)
+			f.write('%s\t%s\t%d\t%d\t%s\n' % (name, file_dict[name], shape[0], shape[1], dtype))
+
+
+# write the journal of every edge of tree to filename. lines starting with '##chrom'
+#   give index, allele and length of the root chromosomes, then one event per line: index of the node below the
+#   edge, event type, chromosome index, allele and the other fields of the event (see GeneProf.journal),
+#   the second chromosome of trans events as index and allele, snv positions comma separated
+def write_journal(tree, filename):
+	with open(filename, 'w') as f:
+		root_chrom_dict = tree.rootNode.geneProf.chrom_dict
+		for key in sorted(root_chrom_dict.keys(), key = lambda x: (get_chrom_sort_key(x[0]), x[1])):
+			f.write('##chrom\t%s\t%d\t%d\n' % (key[0], key[1], root_chrom_dict[key].n))
+		f.write('#node\ttype\tchrom\tpm\tfields\n')
+		for idx in sorted(tree.idx_node_dict.keys()):
+			for event in tree.idx_node_dict[idx].journal:
+				fields = [idx, event[0], event[1][0], event[1][1]]
+				if event[0] == 'snv':
+					fields.append(','.join(str(pos) for pos in event[2]))
+				elif event[0] == 'trans':
+					fields.extend([event[2], event[3], event[4][0], event[4][1], event[5]])
+				else:
+					fields.extend(event[2:])
+				f.write('\t'.join(str(field) for field in fields) + '\n')
+
+
+# read a journal written by write_journal
+# output chrom_len_dict (key: (chromosome index, allele), val: length) and journal_dict (key: node index,
+#   val: list of events), Tree.load_journal(journal_dict) replays them on a tree with the same edges
+def read_journal(filename):
+	chrom_len_dict = dict()
+	journal_dict = dict()
+	with open(filename) as f:
+		for line in f:
+			fields = line.rstrip('\n').split('\t')
+			if fields[0] == '##chrom':
+				chrom_len_dict[(fields[1], int(fields[2]))] = int(fields[3])
+				continue
+			if fields[0].startswith('#'):
+				continue
+			(idx, mut_type, key) = (int(fields[0]), fields[1], (fields[2], int(fields[3])))
+			if mut_type == 'snv':
+				event = (mut_type, key, [ int(pos) for pos in fields[4].split(',') if pos != '' ])
+			elif mut_type == 'trans':
+				event = (mut_type, key, int(fields[4]), int(fields[5]), (fields[6], int(fields[7])), int(fields[8]))
+			else:
+				event = (mut_type, key) + tuple(int(field) for field in fields[4:])
+			journal_dict.setdefault(idx, []).append(event)
+	return chrom_len_dict, journal_dict
 
 
 # given cnv_idx(int) and r(int), output rec_id(str)
@@ -936,7 +1221,7 @@ def get_snv_rec_id(snv_idx, g):
 # generate a vcf file for each sample
 def generate_s_snv(metaFile, tree, l, sv_cn_idx_dict, r, seg_cn_idx_dict, g, snv_cn_idx_dict, snv_sampled_idx, snv_unsampled_idx,
 			   seg_bgn_idx_dict, seg_end_idx_dict, F, F_unsampled_snv, U, C, c_p, c_m, a, h, mate_dict, outputFolder, sample_prob_idx,
-				   A_sv, A_snv, R_sv, R_snv, phylowgs_cnv_info):
+				   A_sv, A_snv, R_sv, R_snv, phylowgs_cnv_info, bgzip_vcf = False):
 	vcf_reader = vcf.Reader(open(metaFile, 'r'))
 	VAF_sv = A_sv / (A_sv + R_sv)
 	VAF_snv = A_snv / (A_snv + R_snv)
@@ -947,25 +1232,34 @@ def generate_s_snv(metaFile, tree, l, sv_cn_idx_dict, r, seg_cn_idx_dict, g, snv
 	mixed_h = np.dot(U, h) # m * l
 	cntmd_dict = {}
 	df_phylowgs_list = []
+	snv_sampled_col = get_snv_col_idx(snv_sampled_idx, g)
+	snv_unsampled_col = get_snv_col_idx(snv_unsampled_idx, g)
+	# segments in the order they are written: by chromosome, then by index
+	seg_list = [(chrom, key, val) for chrom in sorted(seg_cn_idx_dict.keys(),key=int)
+				for (key, val) in sorted(seg_cn_idx_dict[chrom].items(), key = lambda x: int(x[1]))]
+	seg_vals = np.array([val for (chrom, key, val) in seg_list], dtype=int)
 
 	for i in range(len(U)):
 		sample_idx = i + 1
 		cntmd_dict[sample_idx] = {}
 
-		df_phylowgs = pd.DataFrame(
-			columns=['chromosome', 'start', 'end', 'major_cn', 'minor_cn', 'cellular_prevalence'])
+		df_phylowgs = pd.DataFrame({'chromosome': [chrom for (chrom, key, val) in seg_list],
+									'start': [key[0] for (chrom, key, val) in seg_list], 'end': [key[1] for (chrom, key, val) in seg_list],
+									'major_cn': phylowgs_cnv_info[i, seg_vals, 0].astype(int), 'minor_cn': phylowgs_cnv_info[i, seg_vals, 1].astype(int),
+									'cellular_prevalence': phylowgs_cnv_info[i, seg_vals, 2]},
+								   columns=['chromosome', 'start', 'end', 'major_cn', 'minor_cn', 'cellular_prevalence'])
 		df_phylowgs_list.append(df_phylowgs)
 		if not os.path.exists(outputFolder + '/sample' + str(sample_prob_idx) + '/'):
 			os.mkdir(outputFolder + '/sample' + str(sample_prob_idx))
 		temp_file = outputFolder + '/sample' + str(sample_prob_idx) + '/sample' + str(sample_idx) + '.vcf'
-		temp_writer = vcf.Writer(open(temp_file, 'w'), vcf_reader)
+		temp_writer = VCFWriter(temp_file, vcf_reader, bgzip_vcf)
 		temp_file_unsampled_snv = outputFolder + '/unsampled_snv_sample' + '_' + str(sample_prob_idx) + '_' + str(sample_idx) + '.vcf'
-		temp_writer_unsampled_snv = vcf.Writer(open(temp_file_unsampled_snv, 'w'), vcf_reader)
+		temp_writer_unsampled_snv = VCFWriter(temp_file_unsampled_snv, vcf_reader, bgzip_vcf)
 
 		if not os.path.exists(outputFolder + '/phylowgs'):
 			os.mkdir(outputFolder + '/phylowgs')
 		temp_file_consensus_phylowgs = outputFolder + '/phylowgs/consensus_snv' + str(sample_idx) + '.vcf'
-		temp_writer_consensus_phylowgs = vcf.Writer(open(temp_file_consensus_phylowgs, 'w'), vcf_reader)
+		temp_writer_consensus_phylowgs = VCFWriter(temp_file_consensus_phylowgs, vcf_reader, bgzip_vcf)
 		alt_type, gt_cnv = 'CNV', '1|1' # constants for all cnv records
 		for chrom in sorted(seg_cn_idx_dict.keys(),key=int):
 			cntmd_dict[sample_idx][chrom] = []
@@ -975,10 +1269,7 @@ def generate_s_snv(metaFile, tree, l, sv_cn_idx_dict, r, seg_cn_idx_dict, g, snv
 				info_end = key[1]
 				cn = [F[i][l + len(snv_sampled_idx) + val], F[i][l + len(snv_sampled_idx) + r + val]]
 				cntmd_dict[sample_idx][chrom].append(F[i][l + len(snv_sampled_idx) + val] + F[i][l + len(snv_sampled_idx) + r + val])
-				temp_writer.write_record(generate_cnv(chrom, pos, rec_id, alt_type, info_end, gt_cnv, cn))
-				df_phylowgs_list[i] = df_phylowgs_list[i].append({'chromosome': chrom, 'start': pos,
-			'end': info_end, 'major_cn': int(phylowgs_cnv_info[i, val, 0]), 'minor_cn': int(phylowgs_cnv_info[i, val, 1]),
-				'cellular_prevalence': phylowgs_cnv_info[i, val, 2]}, ignore_index=True)
+				temp_writer.write_cnv(chrom, pos, rec_id, alt_type, info_end, gt_cnv, cn)
 		alt_ori, alt_cS, alt_wMA, gt_sv = True, str(), True, '1|0' # constants for all sv records
 		for chrom in sorted(sv_cn_idx_dict.keys(),key=int):
 			for (key, val) in sorted(sv_cn_idx_dict[chrom].items(), key = lambda x: x[1]):
@@ -992,31 +1283,36 @@ def generate_s_snv(metaFile, tree, l, sv_cn_idx_dict, r, seg_cn_idx_dict, g, snv
 				bdp, dp = int(round(mixed_a[i][val])), int(round(mixed_h[i][val]))
 				info_mateid = get_sv_rec_id(mate_id, l)
 				alt_rO = False if mate_isLeft == True else True
-				temp_writer.write_record(generate_sv(chrom, pos, rec_id, alt_chr, alt_pos, alt_ori, alt_rO, alt_cS, alt_wMA, info_mateid, gt_sv, cnadj, bdp, dp))
+				temp_writer.write_sv(chrom, pos, rec_id, alt_chr, alt_pos, alt_ori, alt_rO, alt_cS, alt_wMA, info_mateid, gt_sv, cnadj, bdp, dp)
 				vaf = VAF_sv[i][val]
 				alt_counts_sv = A_snv[i][val]
 				ref_counts_sv = R_snv[i][val]
-				temp_writer_consensus_phylowgs.write_record(generate_snv_consensus(chrom, pos, rec_id,gt_sv, cnadj, vaf, alt_counts_sv, ref_counts_sv))
+				temp_writer_consensus_phylowgs.write_snv_consensus(chrom, pos, rec_id,gt_sv, cnadj, vaf, alt_counts_sv, ref_counts_sv)
 		###xf: add snvs
 		for (key, val) in sorted(snv_cn_idx_dict.items(), key= lambda x: int(x[1])):
 			chrm, pos = key
 			rec_id = get_snv_rec_id(val, g)
 			gt_snv = '0|1'
-			if val in snv_sampled_idx:
-				cnadj_snv = F[i][np.where(snv_sampled_idx == val)[0][0]+l]
-				temp_writer.write_record(generate_snv(chrm, pos, rec_id, gt_snv, cnadj_snv))
+			col = snv_sampled_col[val]
+			if col != -1:
+				cnadj_snv = F[i][col+l]
+				temp_writer.write_snv(chrm, pos, rec_id, gt_snv, cnadj_snv)
+				# read counts are only simulated for sampled SNVs
+				vaf = VAF_snv[i][col]
+				alt_counts_snv = A_snv[i][col]
+				ref_counts_snv = R_snv[i][col]
+				temp_writer_consensus_phylowgs.write_snv_consensus(chrm, pos, rec_id, gt_snv, cnadj_snv,vaf, alt_counts_snv, ref_counts_snv)
 			else:
-				cnadj_snv = F_unsampled_snv[i][np.where(snv_unsampled_idx == val)[0][0]]
-				temp_writer_unsampled_snv.write_record(generate_snv(chrm, pos, rec_id, gt_snv, cnadj_snv))
-			vaf = VAF_snv[i][np.where(snv_sampled_idx == val)[0][0]]
-			alt_counts_snv = A_snv[i][np.where(snv_sampled_idx == val)[0][0]]
-			ref_counts_snv = R_snv[i][np.where(snv_sampled_idx == val)[0][0]]
-			temp_writer_consensus_phylowgs.write_record(generate_snv_consensus(chrm, pos, rec_id, gt_snv, cnadj_snv,vaf, alt_counts_snv, ref_counts_snv))
+				cnadj_snv = F_unsampled_snv[i][snv_unsampled_col[val]]
+				temp_writer_unsampled_snv.write_snv(chrm, pos, rec_id, gt_snv, cnadj_snv)
+		temp_writer.close()
+		temp_writer_unsampled_snv.close()
+		temp_writer_consensus_phylowgs.close()
 	return cntmd_dict, df_phylowgs_list
 
 
 def generate_s(metaFile, tree, l, sv_cn_idx_dict, r, seg_cn_idx_dict,
-			   seg_bgn_idx_dict, seg_end_idx_dict, F, U, C, c_p, c_m, a, h, mate_dict, outputFolder):
+			   seg_bgn_idx_dict, seg_end_idx_dict, F, U, C, c_p, c_m, a, h, mate_dict, outputFolder, bgzip_vcf = False):
 	vcf_reader = vcf.Reader(open(metaFile, 'r'))
 	vcf_reader.metadata['filedate'][0] = datetime.datetime.now().date().strftime('%Y%m%d')  # set date to current date
 	f_p = np.dot(U, c_p)
@@ -1028,7 +1324,7 @@ def generate_s(metaFile, tree, l, sv_cn_idx_dict, r, seg_cn_idx_dict,
 		cntmd_dict[i+1] = {}
 		sample_idx = i + 1
 		temp_file = outputFolder + '/sample' + str(sample_idx) + '.vcf'
-		temp_writer = vcf.Writer(open(temp_file, 'w'), vcf_reader)
+		temp_writer = VCFWriter(temp_file, vcf_reader, bgzip_vcf)
 
 		alt_type, gt_cnv = 'CNV', '1|1'  # constants for all cnv records
 		for chrom in sorted(seg_cn_idx_dict.keys(),key=int):
@@ -1039,7 +1335,7 @@ def generate_s(metaFile, tree, l, sv_cn_idx_dict, r, seg_cn_idx_dict,
 				info_end = key[1]
 				cn = [f_p[i][val], f_m[i][val]]
 				cntmd_dict[i + 1][chrom].append(f_p[i][val] + f_m[i][val])
-				temp_writer.write_record(generate_cnv(chrom, pos, rec_id, alt_type, info_end, gt_cnv, cn))
+				temp_writer.write_cnv(chrom, pos, rec_id, alt_type, info_end, gt_cnv, cn)
 
 		alt_ori, alt_cS, alt_wMA, gt_sv = True, str(), True, '1|0'  # constants for all sv records
 		for chrom in sorted(sv_cn_idx_dict.keys(),key=int):
@@ -1054,78 +1350,9 @@ def generate_s(metaFile, tree, l, sv_cn_idx_dict, r, seg_cn_idx_dict,
 				bdp, dp = int(round(mixed_a[i][val])), int(round(mixed_h[i][val]))
 				info_mateid = get_sv_rec_id(mate_id, l)
 				alt_rO = False if mate_isLeft == True else True
-				temp_writer.write_record(
-					generate_sv(chrom, pos, rec_id, alt_chr, alt_pos, alt_ori, alt_rO, alt_cS, alt_wMA, info_mateid,
-								gt_sv, cnadj, bdp, dp))
-
-
-# chrom(str), pos(int), rec_id(str), ref(str), qual = None, filter(list), fmt = 'GT:CNADJ', sample = ['TUMOR', 'NORMAL']
-# type(alts): list
-#              type(alts[0]) = class 'vcf.model._Breakend'
-#              dir(alts[0]): [..., 'chr', 'connectingSequence', 'orientation', 'pos', 'remoteOrientation', 'type', 'withinMainAssembly']
-#                           eg. alts[0] = ]1:149965077]
-#                               'chr' = str(1), 'connectingSequence' = str(), 'orientation' = True, 'pos' = int(149965077)
-#                               'remoteOrientation' = False, 'type' = 'BND', 'withinMainAssembly' = True
-# info(dict), info['SVTYPE'] = 'BND', info['MATEID'] = mate_sv_rec_id (str)
-def generate_sv(chrm, pos, rec_id, alt_chr, alt_pos, alt_ori, alt_rO, alt_cS, alt_wMA, info_mateid, gt, cnadj, bdp, dp):
-	ref = '.'
-	alts = list()
-	alts.append(vcf.parser._Breakend(alt_chr, alt_pos, alt_ori, alt_rO, alt_cS, alt_wMA))
-	qual = None
-	filt = list()
-	info = dict()
-	info['SVTYPE'] = 'BND'
-	info['MATEID'] = info_mateid
-	fmt = 'GT:CNADJ:BDP:DP'
-	samples = ['TUMOR', 'NORMAL']
-	calls = [vcf.model._Call(0, 'TUMOR', svCallData(gt,cnadj,bdp,dp)), vcf.model._Call(1, 'NORMAL', svCallData('0|0',0, 0, dp))]
-	newRec = vcf.model._Record(chrm, pos, rec_id, ref, alts, qual, filt, info, fmt, samples, calls)
-	return newRec
-
-def generate_snv(chrm, pos, rec_id, gt, cnadj):
-	ref = '.'
-	alt = list()
-	alt.append(vcf.model._Substitution("N"))
-	qual = None
-	filt = list()
-	info = dict()
-	fmt = 'GT:CNADJ'
-	samples = ['TUMOR', 'NORMAL']
-	calls = [vcf.model._Call(0, 'TUMOR', snvCallData(gt,cnadj)), vcf.model._Call(1, 'NORMAL', snvCallData('0|0', 0))]
-	newRec = vcf.model._Record(chrm, pos, rec_id, ref, alt, qual, filt, info, fmt, samples, calls)
-	return newRec
-
-
-def generate_snv_consensus(chrm, pos, rec_id, gt, cnadj, vaf, alt_count, ref_count):
-	ref = '.'
-	alt = list()
-	alt.append(vcf.model._Substitution("N"))
-	qual = None
-	filt = list()
-	info = dict()
-	info['VAF'] = vaf
-	info['t_alt_count'] = alt_count
-	info['t_ref_count'] = ref_count
-	fmt = 'GT:CNADJ'
-	samples = ['TUMOR', 'NORMAL']
-	calls = [vcf.model._Call(0, 'TUMOR', snvCallData(gt, cnadj)), vcf.model._Call(1, 'NORMAL', snvCallData('0|0', 0))]
-	newRec = vcf.model._Record(chrm, pos, rec_id, ref, alt, qual, filt, info, fmt, samples, calls)
-	return newRec
-
-def generate_cnv(chrm, pos, rec_id, alt_type, info_end, gt, cn):
-	ref = '.'
-	alts = list()
-	alts.append(vcf.model._SV(alt_type))
-	qual = None
-	filt = list()
-	info = dict()
-	info['IMPRECISE'] = True
-	info['END'] = info_end
-	fmt = 'GT:CN'
-	samples = ['TUMOR', 'NORMAL']
-	calls = [vcf.model._Call(0, 'TUMOR', cnvCallData(gt, cn)), vcf.model._Call(1, 'NORMAL', cnvCallData('0|0',[1, 1]))]
-	newRec = vcf.model._Record(chrm, pos, rec_id, ref, alts, qual, filt, info, fmt, samples, calls)
-	return newRec
+				temp_writer.write_sv(chrom, pos, rec_id, alt_chr, alt_pos, alt_ori, alt_rO, alt_cS, alt_wMA, info_mateid,
+									 gt_sv, cnadj, bdp, dp)
+		temp_writer.close()
 
 
 def is_cnv_record(rec):
@@ -1140,15 +1367,59 @@ def is_snv_record(rec):
 	return rec.ID[0:3] == 'snv'
 
 
+# seed (int), keys: names and indices of a child random stream, eg. get_child_seed(seed, 'patient', 3)
+# output a seed (int) for np.random.RandomState that only depends on seed and keys, so child streams are
+#   reproducible whatever order (or process) they are used in
+def get_child_seed(seed, *keys):
+	digest = hashlib.sha256('_'.join(str(key) for key in (seed,) + keys)).digest()
+	return struct.unpack('<I', digest[:4])[0]
+
+
+# read chromosome lengths from a .fai or chrom.sizes file (tab-separated, name and length in the first two columns)
+# a leading 'chr' is removed and X, Y become 23, 24 like in the ICGC data. other contigs (M, MT, unplaced and alt
+#   ones) are skipped. output list of (chromosome index (str), length (int)) in file order
+def read_chrom_sizes(filename):
+	result = list()
+	seen = set()
+	with open(filename) as f:
+		for line in f:
+			fields = line.rstrip('\n').split('\t')
+			if len(fields) < 2 or line.startswith('#'):
+				continue
+			chrm = fields[0][3:] if fields[0].lower().startswith('chr') else fields[0]
+			chrm = {'X': '23', 'Y': '24'}.get(chrm.upper(), chrm)
+			if not chrm.isdigit():
+				continue
+			chrm = str(int(chrm))
+			if chrm in seen:
+				raise ValueError('chromosome ' + chrm + ' is listed twice in ' + filename)
+			seen.add(chrm)
+			result.append((chrm, int(fields[1])))
+	if not result:
+		raise ValueError('no chromosomes found in ' + filename)
+	return result
+
+
+# numbered chromosomes in numeric order, then the others by name
+def get_chrom_sort_key(chrm):
+	return (0, int(chrm), '') if str(chrm).isdigit() else (1, 0, str(chrm))
+
+
 #########
 # Class #
 #########
 
 class Tree:
 
-	def __init__(self, edge_list, gp):
+	# seed (int): mutations along the edge above node idx are drawn from the child stream get_edge_rng(idx),
+	#             without seed all nodes draw from gp.rng
+	# release (bool): add_mutations_along_edges drops the GeneProf of an internal node but the root as soon as
+	#                 both children are copied from it, see release_geneprof
+	def __init__(self, edge_list, gp, seed = None, release = False):
 		self.edge_list = edge_list
 		self.geneProf = gp # without any mutation
+		self.seed = seed
+		self.release = release
 		self.node_list = self.get_node_list()
 		self.rootNode, self.idx_node_dict = self.construct_tree()
 
@@ -1189,9 +1460,9 @@ class Tree:
 
 
 	def print_tree_info(self):
-		for idx in self.idx_node_dict:
-			print 'node:', idx
-			print self.idx_node_dict[idx].geneProf.print_chrm_seq()
+		for (node, gp) in self.iter_geneprofs():
+			print 'node:', node.index
+			print gp.print_chrm_seq()
 
 
 	# print current node index, parent node index, left child index, and right child index
@@ -1225,91 +1496,298 @@ class Tree:
 
 
 	def print_node_info(self):
-		for idx in self.idx_node_dict:
-			print 'node', idx, ':', self.idx_node_dict[idx].geneProf.print_info()
+		for (node, gp) in self.iter_geneprofs():
+			print 'node', node.index, ':', gp.print_info()
 
 
 	def print_node_gp(self):
-		for idx in self.idx_node_dict:
-			print 'node', idx, ':', self.idx_node_dict[idx].geneProf.print_chrm_seq()
+		for (node, gp) in self.iter_geneprofs():
+			print 'node', node.index, ':', gp.print_chrm_seq()
 
 
-	def add_mutations_along_edges(self, node, geneprof_list): ### xf: node is Treenode class
+	# print how many random SVs and translocation targets were drawn and accepted over all nodes
+	def print_sample_stats(self):
+		stats = gnpr.get_default_sample_stats()
+		for idx in self.idx_node_dict:
+			for key in stats:
+				stats[key] += self.idx_node_dict[idx].sample_stats[key]
+		for (name, draws, rejected) in [('SV', stats['draws'], stats['rejected']), ('translocation target', stats['trans_draws'], stats['trans_rejected'])]:
+			if draws > 0:
+				print name, 'draws:', draws, 'accepted:', draws - rejected, 'acceptance rate:', round(1 - rejected / draws, 4)
+
+
+	# compute copy numbers, breakpoints and SNVs of every node once its mutations are done, and the column
+	#   indices of all nodes' breakpoints, segments and SNVs. the matrix builders read these
+	def summarize(self, n, constants_dict):
+		for (node, gp) in self.iter_geneprofs():
+			node.summarize(gp, constants_dict['cov'], constants_dict['read_len'])
+		self.bp_copy_num_idx = get_bp_copy_num_idx_dict(self, n, constants_dict)
+		self.seg_copy_num_idx = get_seg_copy_num_idx_dict(self, n)
+		self.snv_copy_num_idx = get_snv_copy_num_idx_dict(self)
+
+
+	# bp_index (gnpr.BreakpointIndex) collects the breakpoints of every node once its mutations are done
+	# both children are copied from node before the first subtree is simulated, with self.release the GeneProf
+	#   of node is dropped then. the GeneProfs held are the leaves', the current path's and the copies of the
+	#   siblings still to be simulated along it
+	def add_mutations_along_edges(self, node, bp_index): ### xf: node is Treenode class
 		if not node:
 			return
-		curr_gp = node.geneProf
-		geneprof_list.append(curr_gp) ### xf: make sure each calling of add_mutations_along_edges will be saved, node is resursive
-		#print 'node:', node.index, 'geneprof_list:'
-		for k in curr_gp.chrom_dict.keys():
+		bp_index.add_geneprof(node.geneProf) ### xf: make sure each calling of add_mutations_along_edges will be saved, node is resursive
+		for k in node.geneProf.chrom_dict.keys():
 			#print(k)
-			c = curr_gp.chrom_dict[k].mut
+			c = node.geneProf.chrom_dict[k].mut
 			while c != None:
 				#print(c.bgn, c.end, chpr._get_org_pos(c, True)[0], chpr._get_org_pos(c, False)[0])
 				c = c.r
 
-		if node.left != None:
-			print('node:',node.left.index)
-			curr_gp_copied_left = curr_gp.deepcopy()
-			# reset copied_node.geneProf.mutCount and copied_node.geneProf.maxCount
-			curr_gp_copied_left.mutCount, curr_gp_copied_left.maxCount = 0, curr_gp_copied_left.get_mut_count() ### xf: get_mut_count: random.poisson(exp_mut_rate)
-
-			curr_gp_copied_left.multi_mutations(geneprof_list) ### xf: generate multiple mutations
-
-
-			node.left.geneProf = curr_gp_copied_left
-			self.add_mutations_along_edges(node.left, geneprof_list)
-
-		if node.right != None:
-			print('node:',node.right.index)
-			curr_gp_copied_right = curr_gp.deepcopy()
-
-			# reset copied_node.geneProf.mutCount and copied_node.geneProf.maxCount
-			curr_gp_copied_right.mutCount, curr_gp_copied_right.maxCount = 0, curr_gp_copied_right.get_mut_count()
-
-			curr_gp_copied_right.multi_mutations(geneprof_list)
-			node.right.geneProf = curr_gp_copied_right
-			self.add_mutations_along_edges(node.right, geneprof_list)
+		children = [ child for child in [node.left, node.right] if child != None ]
+		for child in children:
+			child.geneProf = node.geneProf.deepcopy()
+		if self.release:
+			self.release_geneprof(node)
+		for child in children:
+			print('node:',child.index)
+			self.mutate_edge(child, bp_index, child.geneProf)
+			self.add_mutations_along_edges(child, bp_index)
 		return
 
+	# draw the mutations of the edge above node on gp, a copy of the GeneProf of the parent of node made here if None
+	def mutate_edge(self, node, bp_index, gp = None):
+		if gp is None:
+			gp = node.parent.geneProf.deepcopy()
+		gp.rng = self.get_edge_rng(node.index)
+		# reset copied_node.geneProf.mutCount and copied_node.geneProf.maxCount
+		gp.mutCount, gp.maxCount = 0, gp.get_mut_count() ### xf: get_mut_count: random.poisson(exp_mut_rate)
+		node.geneProf = gp
+		node.journal = gp.journal # both are appended to by the mutations
+		node.sample_stats = gp.sample_stats
+		gp.multi_mutations(bp_index) ### xf: generate multiple mutations
+
+	# same as add_mutations_along_edges(self.rootNode, bp_index), but the subtrees of the nodes split_depth edges below
+	#   the root are simulated by num_workers processes (with num_workers = 1 one after another in this process,
+	#   which gives the same result). the nodes above split_depth are mutated first, then every subtree draws
+	#   its mutations against the breakpoints of those nodes only. the new breakpoints of the subtrees are
+	#   reserved from left to right, a subtree reusing a breakpoint reserved before is simulated again in this
+	#   process against all reserved breakpoints, so breakpoints of different nodes still never coincide
+	def add_mutations_along_subtrees(self, bp_index, num_workers, split_depth):
+		global _subtree_state
+		subtree_list = list()
+		self.add_mutations_above_depth(self.rootNode, bp_index, split_depth, subtree_list)
+		snapshot = bp_index.copy()
+		if num_workers > 1 and len(subtree_list) > 1:
+			# forked workers inherit the tree and the snapshot, only the subtree results are sent back
+			_subtree_state = (self, snapshot)
+			pool = multiprocessing.Pool(min(num_workers, len(subtree_list)))
+			result_list = pool.map(simulate_subtree_worker, [ node.index for node in subtree_list ], chunksize = 1)
+			pool.close()
+			pool.join()
+			_subtree_state = None
+		else:
+			result_list = [ self.simulate_subtree(node, snapshot) for node in subtree_list ]
+		for (node, (node_dict, new_bps_dict)) in zip(subtree_list, result_list):
+			if bp_index.has_any(new_bps_dict):
+				print('subtree', node.index, 'reuses a reserved breakpoint, simulate it again')
+				self.mutate_edge(node, bp_index)
+				self.add_mutations_along_edges(node, bp_index)
+			else:
+				for (idx, (gp, journal, sample_stats)) in node_dict.items():
+					curr = self.idx_node_dict[idx]
+					(curr.geneProf, curr.journal, curr.sample_stats) = (gp, journal, sample_stats)
+				bp_index.add_bps(new_bps_dict)
+
+	# add_mutations_along_edges for the nodes less than depth edges below node. the nodes depth edges below it
+	#   are appended to subtree_list from left to right, without mutating the edges above them
+	def add_mutations_above_depth(self, node, bp_index, depth, subtree_list):
+		bp_index.add_geneprof(node.geneProf)
+		for child in [node.left, node.right]:
+			if child != None:
+				if depth <= 1:
+					subtree_list.append(child)
+				else:
+					print('node:',child.index)
+					self.mutate_edge(child, bp_index)
+					self.add_mutations_above_depth(child, bp_index, depth - 1, subtree_list)
+
+	# mutate the edge above node and the subtree below it against a copy of snapshot (gnpr.BreakpointIndex),
+	#   a worker simulating several subtrees starts every one from the same breakpoints
+	# output (node_dict, new_bps_dict). node_dict: dictionary, key: index of a node in the subtree,
+	#   val: (GeneProf, None if released, journal, sample_stats). new_bps_dict: breakpoints of the subtree
+	#   not in snapshot, as from gnpr.BreakpointIndex.get_new_bps
+	def simulate_subtree(self, node, snapshot):
+		bp_index = snapshot.copy()
+		self.mutate_edge(node, bp_index)
+		self.add_mutations_along_edges(node, bp_index)
+		node_dict = dict()
+		stack = [node]
+		while stack:
+			curr = stack.pop()
+			node_dict[curr.index] = (curr.geneProf, curr.journal, curr.sample_stats)
+			stack.extend(child for child in [curr.left, curr.right] if child != None)
+		return node_dict, bp_index.get_new_bps(snapshot)
+
+	# drop the GeneProf of node if it is an internal node but the root, the journal of the edge above it is kept
+	#   in node and iter_geneprofs rebuilds the GeneProf when it is needed
+	def release_geneprof(self, node):
+		if node != self.rootNode and node.left != None:
+			node.geneProf = None
+
+	# release_geneprof for every node, the ones not released during the simulation (see self.release) are
+	#   the nodes above the subtrees of add_mutations_along_subtrees
+	def release_geneprofs(self):
+		for node in self.idx_node_dict.values():
+			self.release_geneprof(node)
+
+	# journal_dict (as from read_journal): key: node index, val: journal of the edge above the node
+	# replace the mutations of all nodes by the ones of journal_dict, the root must not be mutated
+	def load_journal(self, journal_dict):
+		for (idx, node) in self.idx_node_dict.items():
+			node.journal = journal_dict.get(idx, [])
+			if node != self.rootNode:
+				node.geneProf = None
+
+	# yield (node, GeneProf) of every node, depth first. a released GeneProf is rebuilt by replaying the journal
+	#   of the edge above it on a copy of its parent's, so only the ones of a path and its siblings are held at once
+	def iter_geneprofs(self):
+		stack = [(self.rootNode, self.rootNode.geneProf)]
+		while stack:
+			(node, gp) = stack.pop()
+			yield node, gp
+			for child in [node.right, node.left]:
+				if child != None:
+					child_gp = child.geneProf
+					if child_gp is None:
+						child_gp = gp.deepcopy()
+						child_gp.replay(child.journal)
+					stack.append((child, child_gp))
+
+	# random number generator of the mutations on the edge above node idx
+	def get_edge_rng(self, idx):
+		if self.seed is None:
+			return self.geneProf.rng
+		return np.random.RandomState(get_child_seed(self.seed, 'edge', idx))
+
+
+# (Tree, gnpr.BreakpointIndex) of the running Tree.add_mutations_along_subtrees, inherited by its forked workers
+_subtree_state = None
+
+# multiprocessing.Pool worker of Tree.add_mutations_along_subtrees
+def simulate_subtree_worker(idx):
+	(tree, snapshot) = _subtree_state
+	return tree.simulate_subtree(tree.idx_node_dict[idx], snapshot)
+
 
 class TreeNode:
+	# geneProf: GeneProf of the node, None once released by Tree.release_geneprof
+	# journal: events of the edge above the node (see GeneProf.journal), set by Tree.mutate_edge
+	# sample_stats: sample_stats of the GeneProf of the node (see GeneProf.sample_stats), set by Tree.mutate_edge
 	def __init__(self, index, gp):
 		self.index = index
 		self.geneProf = gp
+		self.journal = []
+		self.sample_stats = gnpr.get_default_sample_stats()
 		self.left = None
 		self.right = None
 		self.parent = None
 
-class svCallData:
-	def __init__(self, gt = '0|0', cnadj = '0', bdp = '0', dp = '100'):
-		self.GT = gt
-		self.CNADJ = str(cnadj)
-		self.BDP = str(bdp)
-		self.DP = str(dp)
-		self.__getitem__ = self
-
-	def __call__(self, var):
-		return [self.CNADJ, self.BDP, self.DP]
-
-
-class snvCallData:
-	def __init__(self, gt = '0|0', cnadj = '0'):
-		self.GT = gt
-		self.CNADJ = str(cnadj)
-		self.__getitem__ = self
+	# gp: GeneProf of this node (self.geneProf or a rebuilt one)
+	# copy_nums_dict, sv_dict, snv_dict: GeneProf.get_copy_nums_dict(), get_sv_read_nums_dict() and get_snv_dict()
+	# allele_copy_nums_dict: key: key of GeneProf.chrom_dict, val: ChrmProf.get_copy_nums()
+	def summarize(self, gp, cov, read_len):
+		self.copy_nums_dict = gp.get_copy_nums_dict()
+		self.sv_dict = gp.get_sv_read_nums_dict(cov, read_len)
+		self.snv_dict = gp.get_snv_dict()
+		self.allele_copy_nums_dict = dict((key, gp.chrom_dict[key].get_copy_nums()) for key in gp.chrom_dict)
+
+# writes records of sample vcf files as text lines, in the same format as vcf.Writer.write_record writes vcf.model._Record
+#   objects with fmt 'GT:CN' (cnv), 'GT:CNADJ:BDP:DP' (sv) and 'GT:CNADJ' (snv), samples ['TUMOR', 'NORMAL']
+# the header is written by vcf.Writer from template (vcf.Reader), lines are buffered and written in chunks
+# with bgzip, records are kept until close(), then sorted by chromosome and position and written to filename.gz
+#   (BGZF) with a tabix index filename.gz.tbi
+class VCFWriter:
+	def __init__(self, filename, template, bgzip = False, buffer_size = 10000):
+		self.filename = filename
+		self.bgzip = bgzip
+		self.buffer_size = buffer_size
+		self.lines = list()
+		if bgzip:
+			self.stream = StringIO.StringIO()
+			self.records = list()
+		else:
+			self.stream = open(filename, 'w')
+		# INFO fields are ordered by their header definition first, alphabetically second
+		info_order = vcf.Writer(self.stream, template).info_order
+		order_key = lambda field: (info_order[field], field)
+		cnv_info = {'END': 'END=%(info_end)s', 'IMPRECISE': 'IMPRECISE'}
+		sv_info = {'SVTYPE': 'SVTYPE=BND', 'MATEID': 'MATEID=%(info_mateid)s'}
+		consensus_info = {'VAF': 'VAF=%(vaf)s', 't_alt_count': 't_alt_count=%(alt_count)s', 't_ref_count': 't_ref_count=%(ref_count)s'}
+		info_str = lambda info: ';'.join(info[key] for key in sorted(info, key=order_key))
+		self.cnv_line = '%(chrm)s\t%(pos)s\t%(rec_id)s\t.\t<%(alt_type)s>\t.\tPASS\t' + info_str(cnv_info) + '\tGT:CN\t%(gt)s:%(cn)s\t0|0:1,1\n'
+		self.sv_line = '%(chrm)s\t%(pos)s\t%(rec_id)s\t.\t%(alt)s\t.\tPASS\t' + info_str(sv_info) + \
+					   '\tGT:CNADJ:BDP:DP\t%(gt)s:%(cnadj)s:%(bdp)s:%(dp)s\t0|0:0:0:%(dp)s\n'
+		self.snv_line = '%s\t%s\t%s\t.\tN\t.\tPASS\t.\tGT:CNADJ\t%s:%s\t0|0:0\n'
+		self.consensus_line = '%(chrm)s\t%(pos)s\t%(rec_id)s\t.\tN\t.\tPASS\t' + info_str(consensus_info) + \
+							  '\tGT:CNADJ\t%(gt)s:%(cnadj)s\t0|0:0\n'
+
+	# pos, end: 1-based first and last position of the record
+	def write_line(self, line, chrm, pos, end):
+		if self.bgzip:
+			self.records.append((get_chrom_sort_key(chrm), pos, len(self.records), chrm, end, line))
+			return
+		self.lines.append(line)
+		if len(self.lines) >= self.buffer_size:
+			self.flush()
 
-	def __call__(self, var):
-		return [self.CNADJ]
+	def flush(self):
+		self.stream.write(''.join(self.lines))
+		self.lines = list()
 
+	def close(self):
+		if self.bgzip:
+			self.write_bgzf()
+		else:
+			self.flush()
+			self.stream.close()
+
+	def write_bgzf(self):
+		self.records.sort()
+		writer = bgzf.BgzfWriter(open(self.filename + '.gz', 'wb'))
+		writer.write(self.stream.getvalue())
+		index_records = list()
+		for (key, pos, i, chrm, end, line) in self.records:
+			voff_beg = writer.tell()
+			writer.write(line)
+			beg = max(int(pos) - 1, 0)
+			index_records.append((chrm, beg, max(int(end), beg + 1), voff_beg, writer.tell()))
+		writer.close()
+		index_writer = bgzf.BgzfWriter(open(self.filename + '.gz.tbi', 'wb'))
+		index_writer.write(bgzf.get_tabix_index(index_records))
+		index_writer.close()
+		self.records = list()
+
+	# alt_type: 'CNV', cn: list of copy numbers of the two alleles
+	def write_cnv(self, chrm, pos, rec_id, alt_type, info_end, gt, cn):
+		self.write_line(self.cnv_line % {'chrm': chrm, 'pos': pos, 'rec_id': rec_id, 'alt_type': alt_type,
+										 'info_end': info_end, 'gt': gt, 'cn': ','.join(map(str, cn))}, chrm, pos, info_end)
+
+	# breakend alt eg. ]1:149965077], alt_ori: orientation, alt_rO: remote orientation, alt_cS: connecting sequence,
+	#   alt_wMA: within main assembly
+	def write_sv(self, chrm, pos, rec_id, alt_chr, alt_pos, alt_ori, alt_rO, alt_cS, alt_wMA, info_mateid, gt, cnadj, bdp, dp):
+		remote_chr = alt_chr if alt_wMA else '<' + alt_chr + '>'
+		if alt_rO:
+			remote_tag = '[%s:%s[' % (remote_chr, alt_pos)
+		else:
+			remote_tag = ']%s:%s]' % (remote_chr, alt_pos)
+		alt = remote_tag + alt_cS if alt_ori else alt_cS + remote_tag
+		self.write_line(self.sv_line % {'chrm': chrm, 'pos': pos, 'rec_id': rec_id, 'alt': alt, 'info_mateid': info_mateid,
+										'gt': gt, 'cnadj': cnadj, 'bdp': bdp, 'dp': dp}, chrm, pos, pos)
 
-class cnvCallData:
-	def __init__(self, gt = '0|0', cns = [1, 1]):
-		self.GT = gt
-		self.CN = cns
-		self.__getitem__ = self
+	def write_snv(self, chrm, pos, rec_id, gt, cnadj):
+		self.write_line(self.snv_line % (chrm, pos, rec_id, gt, cnadj), chrm, pos, pos)
 
-	def __call__(self, var):
-		return [','.join(str(x) for x in self.CN)]
+	def write_snv_consensus(self, chrm, pos, rec_id, gt, cnadj, vaf, alt_count, ref_count):
+		self.write_line(self.consensus_line % {'chrm': chrm, 'pos': pos, 'rec_id': rec_id, 'vaf': vaf, 'alt_count': alt_count,
+											   'ref_count': ref_count, 'gt': gt, 'cnadj': cnadj}, chrm, pos, pos)
 
 
 ###########################################
@@ -1330,7 +1808,30 @@ def get_args(argv):
 	parser.add_argument('-sto', '--stochastic_model', dest='deterministic', action='store_false')
 	parser.add_argument('-leaf', '--only_leaf', dest='only_leaf', action='store_true')
 	parser.add_argument('-rd', '--read_depth', type=int, dest='read_depth', default=50)
-	return vars(parser.parse_args(argv))
+	parser.add_argument('-tm', '--tree_model', type=str, dest='tree_model', default='uniform', choices=['uniform', 'yule', 'coalescent'])
+	parser.add_argument('-bgz', '--bgzip_vcf', dest='bgzip_vcf', action='store_true', help='write sample vcfs as bgzip-compressed .vcf.gz files with tabix .tbi indices')
+	parser.add_argument('-mf', '--matrix_format', type=str, dest='mtx_format', default='tsv', choices=['tsv', 'npy', 'npz'],
+						help='format of U, C, W, B and F matrices: tab-separated text, one .npy per matrix or one matrices.npz bundle')
+	parser.add_argument('-spm', '--sparse_matrix', dest='sparse_mtx', action='store_true',
+						help='write C, W and B as sparse .csc.npz files instead of in --matrix_format')
+	parser.add_argument('-sd', '--seed', type=int, dest='seed', default=None, help='seed of all random draws, drawn at random if not given')
+	parser.add_argument('-cf', '--chrom_sizes', type=str, dest='chrom_sizes', default=None,
+						help='.fai or chrom.sizes file with the chromosomes to simulate, default chromosomes 1 and 2')
+	parser.add_argument('-wg', '--whole_genome', dest='whole_genome', action='store_true',
+						help='simulate chromosomes 1-23 with the lengths in icgc_grch37.chrom.sizes')
+	parser.add_argument('-jr', '--journal', dest='journal', action='store_true',
+						help='write the mutations of every edge to journal.tsv and drop the genome of an internal node once its children are copied, it is replayed when needed')
+	parser.add_argument('-w', '--workers', type=int, dest='workers', default=1, help='number of processes simulating patients in parallel')
+	parser.add_argument('-stw', '--subtree_workers', type=int, dest='subtree_workers', default=0,
+						help='simulate the subtrees below --subtree_depth with this many processes, 0 simulates the whole tree depth first')
+	parser.add_argument('-std', '--subtree_depth', type=int, dest='subtree_depth', default=3,
+						help='depth (edges below the root) of the subtrees simulated by --subtree_workers')
+	args = vars(parser.parse_args(argv))
+	if args['workers'] > 1 and args['subtree_workers'] > 1:
+		parser.error('--workers and --subtree_workers can not both be larger than 1')
+	if args['subtree_depth'] < 1:
+		parser.error('--subtree_depth must be at least 1')
+	return args
 
 
 ##############################
@@ -0,0 +1,153 @@
+#   file: test_chrm_prof.py
+#   purpose: ChrmProf edits checked against a per-base model of the mutated chromosomes.
+#            run from the repository root: python -m unittest discover -s tests
+
+import os
+import sys
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import chrm_prof as chpr
+
+
+# (original chromosome, original position, is inverted) of every position of c, walking its mut list.
+#   also checks that positions, lengths and the position index agree with the list
+def get_mut_seq(c):
+	bgns, nodes = c._get_mut_index()
+	seq = []
+	cur = c.mut
+	i = 0
+	while cur != None:
+		assert i < len(nodes) and nodes[i] is cur and bgns[i] == len(seq) == cur.bgn
+		org = cur.parent
+		assert cur.end - cur.bgn == org.end - org.bgn
+		org_range = range(org.bgn, org.end + 1)
+		if cur.is_inv:
+			org_range.reverse()
+		seq.extend((org.chrm, pos, cur.is_inv) for pos in org_range)
+		cur = cur.r
+		i += 1
+	assert i == len(nodes) and len(seq) == c.n
+	return seq
+
+
+# key: (original chromosome, original position), val: number of SNV copies, over all ChrmProfs of cs
+def get_snv_counts(cs):
+	counts = dict()
+	for c in cs:
+		for (key, val) in c.get_snvs(dict()).items():
+			counts[key] = counts.get(key, 0) + val['copy_num']
+	return counts
+
+
+class ModelTest(unittest.TestCase):
+
+	def setUp(self):
+		self.stdout = sys.stdout
+		sys.stdout = open(os.devnull, 'w') # the edits print every mutation
+
+	def tearDown(self):
+		sys.stdout.close()
+		sys.stdout = self.stdout
+
+	# cs: list of ChrmProfs. seq_dict, snv_dict: key: chromosome, val: per position model (list) of the
+	#   original position and number of SNVs
+	def assert_matches(self, cs, seq_dict, snv_dict):
+		cn_dict = dict()
+		for c in cs:
+			self.assertEqual(get_mut_seq(c), seq_dict[c.chrm])
+			for (chrm, pos, is_inv) in seq_dict[c.chrm]:
+				cn_dict[(chrm, pos)] = cn_dict.get((chrm, pos), 0) + 1
+		for c in cs:
+			(bgns, ends, cps) = c.get_copy_nums()
+			for (bgn, end, cp) in zip(bgns, ends, cps):
+				for pos in xrange(bgn, end + 1):
+					self.assertEqual(cn_dict.get((c.chrm, pos), 0), cp)
+		snv_counts = dict()
+		for chrm in seq_dict:
+			for ((org_chrm, pos, is_inv), num) in zip(seq_dict[chrm], snv_dict[chrm]):
+				if num > 0:
+					snv_counts[(org_chrm, pos)] = snv_counts.get((org_chrm, pos), 0) + num
+		self.assertEqual(get_snv_counts(cs), snv_counts)
+
+	# random amp, rem, inv, trans and SNVs on two short chromosomes, segments often begin at position 0
+	def run_random_edits(self, seed, num_edits):
+		rnd = random.Random(seed)
+		cs = [ chpr.ChrmProf(rnd.randint(8, 30), chrm, 0) for chrm in ['1', '2'] ]
+		seq_dict = dict((c.chrm, [ (c.chrm, pos, False) for pos in xrange(c.n) ]) for c in cs)
+		snv_dict = dict((c.chrm, [0] * c.n) for c in cs)
+		for i in xrange(num_edits):
+			c = rnd.choice(cs)
+			(seq, snvs) = (seq_dict[c.chrm], snv_dict[c.chrm])
+			bgn = rnd.choice([0, rnd.randint(0, c.n - 1)])
+			end = rnd.randint(bgn, min(c.n - 1, bgn + rnd.randint(0, 8)))
+			mut_type = rnd.choice(['amp', 'rem', 'inv', 'trans', 'snv'])
+			if mut_type == 'snv':
+				pos_list = [ rnd.randint(0, c.n - 1) for j in xrange(rnd.randint(1, 3)) ]
+				c.point_mutations(pos_list)
+				for pos in pos_list:
+					snvs[pos] += 1
+			elif mut_type == 'amp':
+				amp_num = rnd.randint(1, 3)
+				if c.amp(bgn, end, amp_num, True):
+					seq[end + 1:end + 1] = seq[bgn:end + 1] * amp_num
+					snvs[end + 1:end + 1] = snvs[bgn:end + 1] * amp_num
+			elif mut_type == 'inv':
+				if c.inv(bgn, end, True):
+					seq[bgn:end + 1] = [ (chrm, pos, not is_inv) for (chrm, pos, is_inv) in reversed(seq[bgn:end + 1]) ]
+					snvs[bgn:end + 1] = snvs[bgn:end + 1][::-1]
+			elif end - bgn + 1 < c.n: # rem and trans leave at least one position
+				if mut_type == 'rem':
+					if c.rem(bgn, end, True):
+						del seq[bgn:end + 1]
+						del snvs[bgn:end + 1]
+					continue
+				to = rnd.choice(cs)
+				ins_pos = rnd.choice([0, rnd.randint(0, to.n - 1)])
+				if to is c and bgn <= ins_pos <= end:
+					continue
+				if not c._is_splitable(bgn, end) or not to._is_splitable_one(ins_pos):
+					continue
+				self.assertTrue(to.trans(c, ins_pos, bgn, end, True) is c)
+				(seg, seg_snvs) = (seq[bgn:end + 1], snvs[bgn:end + 1])
+				del seq[bgn:end + 1]
+				del snvs[bgn:end + 1]
+				if to is c and ins_pos > end:
+					ins_pos -= len(seg)
+				seq_dict[to.chrm][ins_pos:ins_pos] = seg
+				snv_dict[to.chrm][ins_pos:ins_pos] = seg_snvs
+			self.assert_matches(cs, seq_dict, snv_dict)
+
+	def test_random_edits(self):
+		for seed in xrange(200):
+			self.run_random_edits(seed, 40)
+
+	# splitting an inverted head puts the new node left of it, it becomes the head of the mut list
+	def test_split_inverted_head(self):
+		c = chpr.ChrmProf(20, '2', 1)
+		self.assertTrue(c.inv(0, 5, False))
+		self.assertTrue(c.rem(2, 6, False))
+		self.assertTrue(c.rem(6, 9, False))
+		c = chpr.ChrmProf(20, '2', 1)
+		self.assertTrue(c.inv(0, 13, False))
+		self.assertTrue(c.amp(5, 9, 2, False))
+		self.assertEqual(get_mut_seq(c), [ ('2', pos, True) for pos in range(13, 3, -1) + range(8, 3, -1) * 2 + range(3, -1, -1) ] +
+			[ ('2', pos, False) for pos in range(14, 20) ])
+		c = chpr.ChrmProf(20, '2', 1)
+		self.assertTrue(c.inv(0, 7, False))
+		c.point_mutation(2)
+		c.point_mutation(0)
+		self.assertEqual(get_snv_counts([c]), {('2', 5): 1, ('2', 7): 1})
+
+	# the split at the insertion position also cuts the taken out segment if both are copies of one OrgNode
+	def test_trans_split_moved_segment(self):
+		c = chpr.ChrmProf(10, '1', 0)
+		self.assertTrue(c.amp(2, 5, 1, False))
+		self.assertTrue(c.trans(c, 7, 0, 4, False) is c)
+		self.assertEqual(get_mut_seq(c), [ ('1', pos, False) for pos in [5, 2, 0, 1, 2, 3, 4, 3, 4, 5, 6, 7, 8, 9] ])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,87 @@
+#   file: test_gene_prof.py
+#   purpose: GeneProf sampling and copy number checks on short chromosomes.
+#            run from the repository root: python -m unittest discover -s tests
+
+import os
+import sys
+import unittest
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'helper'))
+
+import chrm_prof as chpr
+import gene_prof as gnpr
+
+
+# GeneProf of chromosomes 1 and 2 with both alleles of length n each, without mutations
+def get_geneprof(n, mut_types = ['amp', 'amp', 'inv', 'rem', 'rem', 'trans'], seed = 0):
+	chrom_dict = dict()
+	for chrm in ['1', '2']:
+		for pm in [0, 1]:
+			chrom_dict[(chrm, pm)] = chpr.ChrmProf(n, chrm, pm)
+	constants_dict = {'mut_types': mut_types, 'exp_mut_size': 3, 'exp_mut_count': 0, 'snv_mut_lambda': None,
+					  'cov': 20, 'read_len': 300}
+	return gnpr.GeneProf(chrom_dict, constants_dict, np.random.RandomState(seed))
+
+
+class GeneProfTest(unittest.TestCase):
+
+	def setUp(self):
+		self.stdout = sys.stdout
+		sys.stdout = open(os.devnull, 'w') # the edits print every mutation
+
+	def tearDown(self):
+		sys.stdout.close()
+		sys.stdout = self.stdout
+
+	# every insertion position is drawn, none is a breakpoint, inside the segment or past the chromosome end
+	def test_random_trans_ins(self):
+		gp = get_geneprof(12)
+		gp.apply_event(('inv', ('1', 0), 3, 5), False)
+		gp.apply_event(('rem', ('1', 0), 8, 8), False) # ('1', 0) has length 11 and breakpoints 3, 6 and 8
+		gp.chrom_dict = {('1', 0): gp.chrom_dict[('1', 0)]}
+		counts = dict()
+		for i in xrange(2000):
+			(chr2, ins_pos) = gp.random_trans_ins(('1', 0), 0, 2)
+			counts[ins_pos] = counts.get(ins_pos, 0) + 1
+		self.assertEqual(sorted(counts.keys()), [4, 5, 7, 9, 10])
+
+	# a translocation at the end of the chromosome is applied and journaled, an illegal one neither
+	def test_apply_trans(self):
+		gp = get_geneprof(20)
+		self.assertTrue(gp.apply_event(('trans', ('1', 0), 2, 5, ('2', 0), 19), False))
+		self.assertFalse(gp.apply_event(('trans', ('1', 0), 2, 5, ('2', 0), 24), False))
+		self.assertTrue(isinstance(gp.chrom_dict[('1', 0)], chpr.ChrmProf))
+		self.assertEqual(gp.journal, [('trans', ('1', 0), 2, 5, ('2', 0), 19)])
+		self.assertEqual(gp.chrom_dict[('2', 0)].n, 24)
+
+	def assert_copy_nums_fresh(self, gp):
+		cached = gp.get_copy_nums_dict()
+		gp.copy_num_dict = dict()
+		self.assertEqual(cached, gp.get_copy_nums_dict())
+
+	# a segment of chromosome 1 moved to chromosome 2 is removed there, with the cache of chromosome 1 warm
+	def test_copy_nums_after_trans(self):
+		gp = get_geneprof(1000)
+		gp.apply_event(('trans', ('1', 0), 100, 199, ('2', 0), 500), False)
+		gp.get_copy_nums_dict()
+		gp = gp.deepcopy()
+		gp.apply_event(('rem', ('2', 0), 520, 579), False)
+		self.assertEqual(gp.get_copy_nums_dict()['1'][2], [1, 1, 0, 1, 1])
+		self.assertEqual(gp.get_copy_nums_dict()['1'][:2], ([0, 100, 120, 180, 200], [99, 119, 179, 199, 999]))
+
+	# cached copy numbers match fresh ones after every mutation, along a chain of copied GeneProfs
+	def test_copy_nums_cache(self):
+		gp = get_geneprof(200, seed = 1)
+		bp_index = gnpr.BreakpointIndex()
+		for i in xrange(20):
+			gp = gp.deepcopy()
+			for j in xrange(5):
+				gp.mutate(bp_index, False)
+				self.assert_copy_nums_fresh(gp)
+			bp_index.add_geneprof(gp)
+
+
+if __name__ == '__main__':
+	unittest.main()
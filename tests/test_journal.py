@@ -0,0 +1,119 @@
+#   file: test_journal.py
+#   purpose: a simulation with --journal writes the same output as without it, translocations included, and its
+#            journal is read back into the same tree.
+#            run from the repository root: python -m unittest discover -s tests
+
+import os
+import sys
+import pickle
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'helper'))
+
+import sim
+import chrm_prof as chpr
+import gene_prof as gnpr
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+# key: path of a file below folder, val: its lines, the ones with the date of the run left out
+def read_output(folder):
+	out_dict = dict()
+	for (dir_path, dir_names, file_names) in os.walk(folder):
+		for file_name in file_names:
+			path = os.path.join(dir_path, file_name)
+			with open(path, 'rb') as f:
+				out_dict[os.path.relpath(path, folder)] = [ line for line in f if 'filedate' not in line ]
+	return out_dict
+
+
+class JournalTest(unittest.TestCase):
+
+	def setUp(self):
+		self.stdout = sys.stdout
+		sys.stdout = open(os.devnull, 'w') # the simulation prints every mutation
+		self.folder = tempfile.mkdtemp()
+
+	def tearDown(self):
+		sys.stdout.close()
+		sys.stdout = self.stdout
+		shutil.rmtree(self.folder)
+
+	# output of sim.main with args into a new folder below self.folder
+	def run_sim(self, name, args):
+		out_folder = os.path.join(self.folder, name)
+		sim.main(['-f', os.path.join(REPO_DIR, '2017_09_18_metadata.vcf'), '-o', out_folder, '-m', '2', '-n', '8',
+				  '-c', '60', '-cs', '400', '-s', '20000000', '-p', '2', '-sto', '-sd', '3'] + args)
+		return read_output(out_folder)
+
+	def assert_same_output(self, args):
+		out_dict = self.run_sim('plain', args)
+		jr_out_dict = self.run_sim('journal', args + ['-jr'])
+		trans_count = 0
+		for (path, lines) in jr_out_dict.items():
+			if os.path.basename(path) == 'journal.tsv':
+				trans_count += sum(1 for line in lines if line.split('\t')[1] == 'trans')
+				del jr_out_dict[path]
+			elif os.path.basename(path) == 'README.md':
+				del jr_out_dict[path]
+				del out_dict[path]
+		self.assertTrue(trans_count > 0)
+		self.assertEqual(sorted(out_dict.keys()), sorted(jr_out_dict.keys()))
+		for path in out_dict:
+			self.assertEqual(out_dict[path], jr_out_dict[path], path)
+
+	# output of run_sim and a list of (Tree, n, constants_dict) of each patient, as summarized by the simulation
+	def run_sim_trees(self, name, args):
+		tree_list = []
+		summarize = sim.Tree.summarize
+		def record(tree, n, constants_dict):
+			summarize(tree, n, constants_dict)
+			tree_list.append((tree, n, constants_dict))
+		sim.Tree.summarize = record
+		try:
+			out_dict = self.run_sim(name, args)
+		finally:
+			sim.Tree.summarize = summarize
+		return out_dict, tree_list
+
+	def test_journal(self):
+		self.assert_same_output([])
+
+	# the nodes above --subtree_depth are released after the simulation, the ones below it during it
+	def test_journal_subtrees(self):
+		self.assert_same_output(['-stw', '1', '-std', '2'])
+
+	# write_journal, read_journal, Tree.load_journal and write_journal again give the same journal, and the loaded
+	#   tree has the copy number, breakpoint and snv indices of a run without --journal
+	def test_journal_round_trip(self):
+		(_, tree_list) = self.run_sim_trees('plain', [])
+		self.run_sim('journal', ['-jr'])
+		self.assertEqual(len(tree_list), 2)
+		for (patient_idx, (plain_tree, n, constants_dict)) in enumerate(tree_list, 1):
+			patient_folder = os.path.join(self.folder, 'journal', 'patient' + str(patient_idx))
+			(chrom_len_dict, journal_dict) = sim.read_journal(os.path.join(patient_folder, 'journal.tsv'))
+			with open(os.path.join(patient_folder, 'edge_list.pickle'), 'rb') as f:
+				edge_list = pickle.load(f)
+			chrom_dict = dict((key, chpr.ChrmProf(length, key[0], key[1])) for (key, length) in chrom_len_dict.items())
+			tree = sim.Tree(edge_list, gnpr.GeneProf(chrom_dict, constants_dict))
+			tree.load_journal(journal_dict)
+
+			journal_file = os.path.join(self.folder, 'journal' + str(patient_idx) + '.tsv')
+			sim.write_journal(tree, journal_file)
+			with open(os.path.join(patient_folder, 'journal.tsv'), 'rb') as f:
+				journal = f.read()
+			with open(journal_file, 'rb') as f:
+				self.assertEqual(journal, f.read())
+
+			tree.summarize(n, constants_dict)
+			self.assertEqual(tree.bp_copy_num_idx, plain_tree.bp_copy_num_idx)
+			self.assertEqual(tree.seg_copy_num_idx, plain_tree.seg_copy_num_idx)
+			self.assertEqual(tree.snv_copy_num_idx, plain_tree.snv_copy_num_idx)
+
+
+if __name__ == '__main__':
+	unittest.main()